@@ -0,0 +1,7 @@
+def __getattr__(name):
+    # The API is imported lazily, as the models cannot be imported before the app registry is ready.
+    if name in ("chain", "group", "schedule_many"):
+        from django_future_tasks import api
+
+        return getattr(api, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
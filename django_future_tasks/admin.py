@@ -17,8 +17,16 @@ class FutureTaskAdminForm(forms.ModelForm):
 
 @admin.register(FutureTask)
 class FutureTaskAdmin(admin.ModelAdmin):
-    list_display = ["task_id", "eta", "type", "status", "periodic_parent_task"]
-    readonly_fields = ["periodic_parent_task"]
+    list_display = [
+        "task_id",
+        "eta",
+        "type",
+        "priority",
+        "status",
+        "periodic_parent_task",
+    ]
+    readonly_fields = ["periodic_parent_task", "locked_by", "lease_expires_at"]
+    raw_id_fields = ["depends_on"]
     list_filter = ["type", "status", "periodic_parent_task"]
     form = FutureTaskAdminForm
 
@@ -0,0 +1,243 @@
+import uuid
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import router, transaction
+from django.utils import timezone
+
+from django_future_tasks.dependencies import add_dependencies
+from django_future_tasks.models import FutureTask
+from django_future_tasks.wakeup import get_wakeup_backend
+
+DEFAULT_CHUNK_SIZE = 1000
+# Number of times a task is coalesced again, if a concurrently scheduled task with the same key prevented its creation.
+MAX_COALESCE_ATTEMPTS = 3
+
+COALESCE_EARLIEST = "earliest"
+COALESCE_LATEST = "latest"
+COALESCE_DEBOUNCE = "debounce"
+COALESCE_MODES = [COALESCE_EARLIEST, COALESCE_LATEST, COALESCE_DEBOUNCE]
+
+
+def _build_task(spec, now):
+    if isinstance(spec, FutureTask):
+        task = spec
+    else:
+        task = FutureTask(**spec)
+    if not task.task_id:
+        task.task_id = uuid.uuid4().hex
+    if task.eta is None:
+        task.eta = now
+    return task
+
+
+def _check_types(tasks):
+    known_types = {task_type for task_type, _label in settings.FUTURE_TASK_TYPES}
+    unknown_types = sorted({task.type for task in tasks} - known_types)
+    if unknown_types:
+        raise ValidationError(
+            {"type": f"Unknown task types: {', '.join(unknown_types)}"},
+        )
+
+
+def _merge(existing, task, coalesce):
+    """Merge `task` into the `existing` one with the same deduplication key."""
+    if coalesce == COALESCE_EARLIEST:
+        existing.eta = min(existing.eta, task.eta)
+    elif coalesce == COALESCE_LATEST:
+        existing.eta = max(existing.eta, task.eta)
+    else:
+        existing.eta = task.eta
+        existing.data = task.data
+
+
+def _coalesce_with_open_tasks(tasks_by_key, coalesce, chunk_size, using):
+    """
+    Merge the tasks into the open tasks with the same deduplication key and return the keys of the merged tasks.
+    """
+    merged_keys = set()
+    keys = list(tasks_by_key)
+    for i in range(0, len(keys), chunk_size):
+        open_tasks = (
+            FutureTask.objects.using(using)
+            .filter(
+                status=FutureTask.FUTURE_TASK_STATUS_OPEN,
+                dedup_key__in=keys[i : i + chunk_size],
+            )
+            .only("pk", "task_id", "dedup_key", "eta", "data")
+        )
+        for open_task in open_tasks:
+            task = tasks_by_key[open_task.dedup_key]
+            _merge(open_task, task, coalesce)
+            # The open task might have been claimed meanwhile, in which case the task is created instead.
+            if (
+                FutureTask.objects.using(using)
+                .filter(
+                    pk=open_task.pk,
+                    status=FutureTask.FUTURE_TASK_STATUS_OPEN,
+                )
+                .update(eta=open_task.eta, data=open_task.data)
+            ):
+                task.pk = open_task.pk
+                task.task_id = open_task.task_id
+                task.eta = open_task.eta
+                task.data = open_task.data
+                merged_keys.add(open_task.dedup_key)
+    return merged_keys
+
+
+def _skipped_tasks(tasks, using):
+    """Set the primary keys of the created tasks and return the ones which have not been created."""
+    pks = {}
+    task_ids = [task.task_id for task in tasks]
+    for i in range(0, len(task_ids), DEFAULT_CHUNK_SIZE):
+        pks.update(
+            FutureTask.objects.using(using)
+            .filter(task_id__in=task_ids[i : i + DEFAULT_CHUNK_SIZE])
+            .values_list("task_id", "pk"),
+        )
+    skipped_tasks = []
+    for task in tasks:
+        task.pk = pks.get(task.task_id)
+        if task.pk is None:
+            skipped_tasks.append(task)
+    return skipped_tasks
+
+
+def schedule_many(tasks, chunk_size=DEFAULT_CHUNK_SIZE, coalesce=COALESCE_EARLIEST):
+    """
+    Create many future tasks at once and return them.
+
+    Each task is given as unsaved FutureTask object or as dictionary of its fields. The `type` is required, a missing
+    `task_id` is generated and a missing `eta` defaults to now. Tasks whose `task_id` exists already are skipped, so
+    scheduling the same tasks twice is a no-op. The tasks are inserted with one query per `chunk_size` tasks and the
+    workers are woken up once after the transaction has been committed.
+
+    Open tasks with the same `dedup_key` (given or existing ones) are coalesced into one task. It keeps the earliest
+    ETA (`coalesce="earliest"`), the latest ETA (`coalesce="latest"`) or takes the ETA and data of the latest scheduled
+    task (`coalesce="debounce"`, i.e. the execution is pushed out as long as duplicates are scheduled). Coalesced tasks
+    are returned once, with the primary key and task ID of the existing task if there is one. If an open task with the
+    same key is created concurrently, the task is coalesced into it as well. Tasks with a deduplication key are returned
+    with their primary key, unless they could neither be created nor coalesced (because the open tasks with their key
+    kept being claimed meanwhile). The primary keys of the other returned tasks are not set.
+    """
+    if coalesce not in COALESCE_MODES:
+        raise ValueError(
+            f"Invalid coalesce mode '{coalesce}', expected one of {', '.join(COALESCE_MODES)}",
+        )
+
+    now = timezone.now()
+    tasks = [_build_task(spec, now) for spec in tasks]
+
+    _check_types(tasks)
+
+    # Tasks with the same deduplication key are coalesced within the given tasks first.
+    scheduled_tasks = []
+    tasks_by_key = {}
+    for task in tasks:
+        if task.dedup_key is None or task.status != FutureTask.FUTURE_TASK_STATUS_OPEN:
+            scheduled_tasks.append(task)
+        elif task.dedup_key in tasks_by_key:
+            _merge(tasks_by_key[task.dedup_key], task, coalesce)
+        else:
+            tasks_by_key[task.dedup_key] = task
+            scheduled_tasks.append(task)
+
+    using = router.db_for_write(FutureTask)
+    merged_keys = _coalesce_with_open_tasks(
+        tasks_by_key,
+        coalesce,
+        chunk_size,
+        using,
+    )
+    FutureTask.objects.using(using).bulk_create(
+        [
+            task
+            for task in scheduled_tasks
+            if task.dedup_key is None or task.dedup_key not in merged_keys
+        ],
+        batch_size=chunk_size,
+        ignore_conflicts=True,
+    )
+
+    # A concurrently scheduled task with the same deduplication key might have been created meanwhile, in which case
+    # the insert has been skipped and the task is coalesced into that one instead.
+    for _attempt in range(MAX_COALESCE_ATTEMPTS):
+        skipped_tasks = _skipped_tasks(
+            [task for task in tasks_by_key.values() if task.pk is None],
+            using,
+        )
+        if not skipped_tasks:
+            break
+        merged_keys = _coalesce_with_open_tasks(
+            {task.dedup_key: task for task in skipped_tasks},
+            coalesce,
+            chunk_size,
+            using,
+        )
+        FutureTask.objects.using(using).bulk_create(
+            [task for task in skipped_tasks if task.dedup_key not in merged_keys],
+            batch_size=chunk_size,
+            ignore_conflicts=True,
+        )
+    if any(
+        task.status == FutureTask.FUTURE_TASK_STATUS_OPEN for task in scheduled_tasks
+    ):
+        transaction.on_commit(get_wakeup_backend(using).notify, using=using)
+    return scheduled_tasks
+
+
+def _create_with_dependencies(tasks, dependencies):
+    """Create the tasks and the `(task, dependency)` pairs among them, the dependent tasks are blocked."""
+    for task, dependency in dependencies:
+        task.status = FutureTask.FUTURE_TASK_STATUS_BLOCKED
+        dependency.has_dependents = True
+
+    using = router.db_for_write(FutureTask)
+    with transaction.atomic(using=using):
+        FutureTask.objects.using(using).bulk_create(tasks)
+        if any(task.pk is None for task in tasks):
+            # Not all databases return the primary keys of bulk inserted objects.
+            pks = dict(
+                FutureTask.objects.using(using)
+                .filter(task_id__in=[task.task_id for task in tasks])
+                .values_list("task_id", "pk"),
+            )
+            for task in tasks:
+                task.pk = pks[task.task_id]
+        add_dependencies(dependencies, using)
+        if any(task.status == FutureTask.FUTURE_TASK_STATUS_OPEN for task in tasks):
+            transaction.on_commit(get_wakeup_backend(using).notify, using=using)
+    return tasks
+
+
+def chain(*tasks):
+    """
+    Create the tasks, so that each one is executed after the previous one is done, and return them.
+
+    The tasks are given like for `schedule_many`. All but the first task are blocked and opened by the worker completing
+    the previous task. If a task fails for good, the following tasks stay blocked.
+    """
+    now = timezone.now()
+    tasks = [_build_task(spec, now) for spec in tasks]
+    _check_types(tasks)
+    return _create_with_dependencies(tasks, list(zip(tasks[1:], tasks[:-1])))
+
+
+def group(tasks, callback=None):
+    """
+    Create the tasks of the group and the optional `callback`, which is executed once all of them are done.
+
+    The tasks are given like for `schedule_many`. The tasks of the group are executed independently of each other,
+    the callback is blocked until the worker completing the last task of the group opens it. The tasks of the group
+    are returned, followed by the callback.
+    """
+    now = timezone.now()
+    tasks = [_build_task(spec, now) for spec in tasks]
+    dependencies = []
+    if callback is not None:
+        callback = _build_task(callback, now)
+        dependencies = [(callback, task) for task in tasks]
+        tasks.append(callback)
+    _check_types(tasks)
+    return _create_with_dependencies(tasks, dependencies)
@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class DjangoFutureTasksConfig(AppConfig):
+    name = "django_future_tasks"
+    default_auto_field = "django.db.models.AutoField"
+
+    def ready(self):
+        # import signal receivers
+        import django_future_tasks.dependencies  # noqa: F401
+        import django_future_tasks.wakeup  # noqa: F401
@@ -0,0 +1,191 @@
+import logging
+import threading
+import timeit
+from collections import defaultdict
+
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, router, transaction
+
+from django_future_tasks.dependencies import release_dependents
+from django_future_tasks.models import FutureTask
+from django_future_tasks.wakeup import get_wakeup_backend
+
+logger = logging.getLogger("process_future_tasks")
+
+COMPLETION_FIELDS = ["status", "execution_time", "result"]
+# Written additionally for failed tasks, which might have been rescheduled for a retry.
+FAILURE_FIELDS = ["attempts", "eta"]
+
+
+def completion_fields(task):
+    """
+    Return the fields to write on completion of the given task.
+
+    The result is skipped if it has neither been loaded nor set, so (potentially large) JSON is never rewritten
+    needlessly.
+    """
+    deferred_fields = task.get_deferred_fields()
+    fields = [field for field in COMPLETION_FIELDS if field not in deferred_fields]
+    if task.status != FutureTask.FUTURE_TASK_STATUS_DONE:
+        fields += FAILURE_FIELDS
+    return fields
+
+
+def persist_completion(tasks, worker_id=None, using=DEFAULT_DB_ALIAS):
+    """
+    Write the completion fields of the tasks with `bulk_update()` and return the primary keys of the written tasks.
+
+    If `worker_id` is given, only the tasks still locked by that worker are written. The lease of a task might have
+    expired meanwhile, in which case it has been handed to another worker, whose state must not be overwritten. Tasks
+    marked as interrupted on termination of the worker are written, as their execution finished nevertheless.
+    """
+    queryset = FutureTask.objects.using(using)
+    if worker_id is not None:
+        queryset = queryset.filter(
+            locked_by=worker_id,
+            status__in=[
+                FutureTask.FUTURE_TASK_STATUS_IN_PROGRESS,
+                FutureTask.FUTURE_TASK_STATUS_INTERRUPTED,
+            ],
+        )
+
+    # Tasks are grouped by their completion fields, as `bulk_update()` requires the same fields for all objects.
+    tasks_by_fields = defaultdict(list)
+    for task in tasks:
+        tasks_by_fields[tuple(completion_fields(task))].append(task)
+    written_pks = set()
+    for fields, field_tasks in tasks_by_fields.items():
+        field_pks = {task.pk for task in field_tasks}
+        if queryset.bulk_update(field_tasks, fields) < len(field_tasks):
+            # Rarely, some tasks have been taken over. The written ones are looked up after the write, so the write
+            # locks are taken first (reading first would let concurrent transactions deadlock on SQLite).
+            written_tasks = FutureTask.objects.using(using).filter(
+                pk__in=field_pks,
+                status__in={task.status for task in field_tasks},
+            )
+            if worker_id is not None:
+                written_tasks = written_tasks.filter(locked_by=worker_id)
+            field_pks = set(written_tasks.values_list("pk", flat=True))
+        written_pks |= field_pks
+    if len(written_pks) < len(tasks):
+        logger.warning(
+            f"Discarded the completion of {len(tasks) - len(written_pks)} tasks, which are not locked by this worker "
+            "anymore",
+        )
+
+    # Retries are not saved by `save()`, so the workers are woken up here.
+    if any(
+        task.status == FutureTask.FUTURE_TASK_STATUS_OPEN and task.pk in written_pks
+        for task in tasks
+    ):
+        transaction.on_commit(get_wakeup_backend(using).notify, using=using)
+    return written_pks
+
+
+def write_completion(tasks, worker_id=None):
+    """
+    Write the completion of the tasks and release their dependents in one transaction.
+
+    So a crash in between cannot leave the dependents of a done task blocked for good. Only the dependents of the
+    written tasks are released (see `persist_completion`).
+    """
+    using = router.db_for_write(FutureTask)
+    with transaction.atomic(using=using):
+        written_pks = persist_completion(tasks, worker_id, using)
+        release_dependents(
+            [task for task in tasks if task.pk in written_pks],
+            using,
+        )
+
+
+def write_task_completion(task, worker_id=None):
+    """
+    Write the completion of a single task like `write_completion`.
+
+    If the task is retried, but an open task with the same deduplication key has been scheduled since the retry has
+    been decided, the task is written as failed instead, as the open task does its work.
+    """
+    try:
+        write_completion([task], worker_id)
+    except IntegrityError:
+        if task.status != FutureTask.FUTURE_TASK_STATUS_OPEN or task.dedup_key is None:
+            raise
+        task.status = FutureTask.FUTURE_TASK_STATUS_ERROR
+        write_completion([task], worker_id)
+
+
+class CompletionBuffer:
+    """
+    Collects completed tasks and writes them with `bulk_update()`.
+
+    The buffer is flushed as soon as it contains `size` tasks or `interval` seconds passed since the last flush. The
+    `post_persist` hook of the `instrumentation` (if given) is called after each flush. If `worker_id` is given, tasks
+    taken over by another worker are not written (see `persist_completion`). The tasks depending on the
+    written tasks are released with the flush as well. If writing the tasks at once fails, they are written one by one
+    and the ones failing again are kept for the next flush.
+    """
+
+    def __init__(self, size, interval, instrumentation=None, worker_id=None):
+        self.size = size
+        self.interval = interval
+        self.instrumentation = instrumentation
+        self.worker_id = worker_id
+        self._tasks = []
+        self._last_flush = timeit.default_timer()
+        # A reentrant lock is required, as the termination signal handler flushes the buffer and may interrupt the
+        # main thread while it holds the lock.
+        self._lock = threading.RLock()
+
+    def add(self, task):
+        with self._lock:
+            self._tasks.append(task)
+            flush = (
+                len(self._tasks) >= self.size
+                or timeit.default_timer() - self._last_flush >= self.interval
+            )
+        if flush:
+            self.flush()
+
+    def pending_pks(self):
+        """Return the primary keys of the buffered tasks, which are still in progress in the database."""
+        with self._lock:
+            return [task.pk for task in self._tasks]
+
+    def flush(self):
+        with self._lock:
+            tasks, self._tasks = self._tasks, []
+            self._last_flush = timeit.default_timer()
+        if not tasks:
+            return
+
+        start_time = timeit.default_timer()
+        try:
+            self._write(tasks)
+        except Exception:
+            logger.exception(
+                f"Writing {len(tasks)} completed tasks at once failed, writing them one by one",
+            )
+            failed_tasks = [task for task in tasks if not self._write_task(task)]
+            if failed_tasks:
+                # The failed tasks are kept (and their leases renewed), so they are written by the next flush.
+                with self._lock:
+                    self._tasks[:0] = failed_tasks
+                failed_task_ids = {id(task) for task in failed_tasks}
+                tasks = [task for task in tasks if id(task) not in failed_task_ids]
+        if self.instrumentation is not None and tasks:
+            self.instrumentation.post_persist(
+                tasks,
+                timeit.default_timer() - start_time,
+            )
+
+    def _write(self, tasks):
+        # A failing write is rolled back to a savepoint, so it does not break a surrounding transaction.
+        write_completion(tasks, self.worker_id)
+
+    def _write_task(self, task):
+        """Write the completion of a single task and return whether it succeeded."""
+        try:
+            write_task_completion(task, self.worker_id)
+        except Exception:
+            logger.exception(f"Writing the completed task {task.task_id} failed")
+            return False
+        return True
@@ -0,0 +1,41 @@
+import copy
+import datetime
+from functools import lru_cache
+
+from croniter import croniter
+
+CACHE_SIZE = 1024
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _parse(cron_string):
+    return croniter(cron_string)
+
+
+def cron_iter(cron_string, start_time):
+    """
+    Return a `croniter` for the given cron string, starting at the given time.
+
+    Parsing a cron string is expensive, so the parsed schedules are cached process-wide and only copied here.
+    """
+    iterator = copy.copy(_parse(cron_string))
+    iterator.set_current(start_time, force=True)
+    return iterator
+
+
+def next_execution(cron_string, start_time):
+    """Return the first time after `start_time` matching the given cron string."""
+    return cron_iter(cron_string, start_time).get_next(datetime.datetime)
+
+
+def cron_range(cron_string, start_time, stop_time):
+    """
+    Yield all times from `start_time` to `stop_time` (both inclusive) matching the given cron string.
+
+    Equivalent to `croniter.croniter_range()`, but based on the cached schedules.
+    """
+    iterator = cron_iter(cron_string, start_time - datetime.timedelta(microseconds=1))
+    dt = iterator.get_next(datetime.datetime)
+    while dt <= stop_time:
+        yield dt
+        dt = iterator.get_next(datetime.datetime)
@@ -0,0 +1,45 @@
+from django.db.models import Min, Q
+
+from django_future_tasks.models import FutureTask
+
+
+def superseded_tasks(queryset):
+    """
+    Return the tasks of `queryset` which cannot be set back to open because of their deduplication key.
+
+    Open tasks are unique per deduplication key, so a task is superseded if its key is taken by an open task or by
+    another task of `queryset` with a lower primary key.
+    """
+    open_keys = FutureTask.objects.filter(
+        status=FutureTask.FUTURE_TASK_STATUS_OPEN,
+        dedup_key__isnull=False,
+    ).values("dedup_key")
+    first_pks = (
+        queryset.filter(dedup_key__isnull=False)
+        .order_by()
+        .values("dedup_key")
+        .annotate(first_pk=Min("pk"))
+        .values("first_pk")
+    )
+    return queryset.filter(dedup_key__isnull=False).filter(
+        Q(dedup_key__in=open_keys) | ~Q(pk__in=first_pks),
+    )
+
+
+def reopen_tasks(queryset, **fields):
+    """
+    Set the tasks of `queryset` back to open (updating the given fields as well) and return their number.
+
+    Superseded tasks (see `superseded_tasks`) are marked as interrupted instead, as the open task with the same
+    deduplication key does their work.
+    """
+    superseded_pks = list(superseded_tasks(queryset).values_list("pk", flat=True))
+    if superseded_pks:
+        FutureTask.objects.filter(pk__in=superseded_pks).update(
+            status=FutureTask.FUTURE_TASK_STATUS_INTERRUPTED,
+            **fields,
+        )
+    return queryset.exclude(pk__in=superseded_pks).update(
+        status=FutureTask.FUTURE_TASK_STATUS_OPEN,
+        **fields,
+    )
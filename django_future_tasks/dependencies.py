@@ -0,0 +1,111 @@
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Exists, OuterRef
+from django.db.models.signals import m2m_changed
+from django.dispatch import receiver
+
+from django_future_tasks.dedup import reopen_tasks
+from django_future_tasks.models import FutureTask
+from django_future_tasks.wakeup import get_wakeup_backend
+
+Dependency = FutureTask.depends_on.through
+
+
+def release_tasks(queryset, using=DEFAULT_DB_ALIAS):
+    """
+    Open the blocked tasks of `queryset` whose dependencies are all done and return their number.
+
+    The tasks are released with a few bulk queries, regardless of their number, and the workers are woken up after
+    the transaction has been committed.
+    """
+    unfinished_dependencies = Dependency.objects.filter(
+        from_futuretask=OuterRef("pk"),
+    ).exclude(to_futuretask__status=FutureTask.FUTURE_TASK_STATUS_DONE)
+    released = reopen_tasks(
+        FutureTask.objects.filter(
+            pk__in=queryset.filter(
+                status=FutureTask.FUTURE_TASK_STATUS_BLOCKED,
+            ).values("pk"),
+        ).exclude(Exists(unfinished_dependencies)),
+    )
+    if released:
+        transaction.on_commit(get_wakeup_backend(using).notify, using=using)
+    return released
+
+
+def release_dependents(tasks, using=DEFAULT_DB_ALIAS):
+    """
+    Release the blocked tasks depending on the given completed tasks and return their number.
+
+    Only the tasks which are done and have dependents are considered, so completing other tasks costs no query.
+    """
+    task_pks = [
+        task.pk
+        for task in tasks
+        if task.has_dependents and task.status == FutureTask.FUTURE_TASK_STATUS_DONE
+    ]
+    if not task_pks:
+        return 0
+    return release_tasks(
+        FutureTask.objects.filter(
+            pk__in=Dependency.objects.filter(to_futuretask__in=task_pks).values(
+                "from_futuretask",
+            ),
+        ),
+        using,
+    )
+
+
+def add_dependencies(dependencies, using=DEFAULT_DB_ALIAS):
+    """
+    Create the given `(task, dependency)` pairs of saved tasks with a single query.
+
+    Open tasks are blocked, the dependencies are flagged to have dependents and blocked tasks whose dependencies are
+    all done already are released right away.
+    """
+    if not dependencies:
+        return
+    with transaction.atomic(using=using):
+        Dependency.objects.using(using).bulk_create(
+            [
+                Dependency(from_futuretask_id=task.pk, to_futuretask_id=dependency.pk)
+                for task, dependency in dependencies
+            ],
+            ignore_conflicts=True,
+        )
+        _flag_dependencies({dependency.pk for _task, dependency in dependencies})
+        _block_and_release({task.pk for task, _dependency in dependencies}, using)
+
+
+def _block_and_release(pks, using):
+    # Open tasks would be claimed regardless of their dependencies, so they are blocked until the dependencies are done.
+    FutureTask.objects.filter(
+        pk__in=pks,
+        status=FutureTask.FUTURE_TASK_STATUS_OPEN,
+    ).update(status=FutureTask.FUTURE_TASK_STATUS_BLOCKED)
+    release_tasks(FutureTask.objects.filter(pk__in=pks), using)
+
+
+def _flag_dependencies(pks):
+    FutureTask.objects.filter(pk__in=pks, has_dependents=False).update(
+        has_dependents=True,
+    )
+
+
+@receiver(m2m_changed, sender=Dependency)
+def dependencies_added(sender, instance, action, reverse, pk_set, using, **kwargs):
+    # Dependencies added by `task.depends_on.add()` (or `task.dependents.add()`) are handled like the ones added by
+    # `add_dependencies`.
+    if action != "post_add" or not pk_set:
+        return
+    with transaction.atomic(using=using):
+        if reverse:
+            _flag_dependencies([instance.pk])
+            _block_and_release(pk_set, using)
+        else:
+            _flag_dependencies(pk_set)
+            _block_and_release([instance.pk], using)
+            instance.status = (
+                FutureTask.objects.filter(pk=instance.pk)
+                .values_list("status", flat=True)
+                .get()
+            )
@@ -1,3 +1,172 @@
+import asyncio
+import functools
+import timeit
+from sys import intern
+
+import django
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ImproperlyConfigured
 from django.dispatch import Signal
 
+# Kept for compatibility, handlers registered with `future_task_handler` take precedence.
 future_task_signal = Signal()
+
+_handlers = {}
+
+
+class UnknownTaskTypeError(Exception):
+    """Raised when a task is dispatched, but neither a handler nor a signal receiver exists for its type."""
+
+
+def future_task_handler(task_type):
+    """
+    Register the decorated function as the handler of the tasks of `task_type`.
+
+    The handler is called with the FutureTask object and may be a coroutine function.
+    """
+
+    def decorator(func):
+        if task_type in _handlers:
+            raise ImproperlyConfigured(
+                f"A handler for the task type '{task_type}' is already registered",
+            )
+        _handlers[task_type] = func
+        return func
+
+    return decorator
+
+
+def get_handler(task_type):
+    """Return the handler registered for `task_type` or `None`."""
+    return _handlers.get(task_type)
+
+
+def _check_receivers(task):
+    if not future_task_signal.has_listeners(sender=intern(task.type)):
+        raise UnknownTaskTypeError(f"No handler for the task type '{task.type}'")
+
+
+def _live_signal_receivers(sender):
+    # Django has no public API listing the receivers of a signal, so the private one is used, which changed with
+    # Django 5.0 to return the synchronous and asynchronous receivers separately.
+    if django.VERSION >= (5, 0):
+        sync_receivers, async_receivers = future_task_signal._live_receivers(sender)
+        return [*sync_receivers, *async_receivers]
+    return future_task_signal._live_receivers(sender)
+
+
+def _receiver_calls(task):
+    """Return the handler or signal receivers of the task, each together with a callable executing it."""
+    handler = _handlers.get(task.type)
+    if handler is not None:
+        return [(handler, functools.partial(handler, task))]
+
+    _check_receivers(task)
+    sender = intern(task.type)
+    return [
+        (
+            receiver,
+            functools.partial(
+                receiver,
+                signal=future_task_signal,
+                sender=sender,
+                instance=task,
+            ),
+        )
+        for receiver in _live_signal_receivers(sender)
+    ]
+
+
+def _dispatch_instrumented(task, instrumentation):
+    for receiver, call in _receiver_calls(task):
+        start_time = timeit.default_timer()
+        try:
+            if asyncio.iscoroutinefunction(receiver):
+                asyncio.run(call())
+            else:
+                call()
+        except Exception as exc:
+            instrumentation.post_receiver(
+                task,
+                receiver,
+                timeit.default_timer() - start_time,
+                exc,
+            )
+            raise
+        instrumentation.post_receiver(
+            task,
+            receiver,
+            timeit.default_timer() - start_time,
+            None,
+        )
+
+
+async def _adispatch_instrumented(task, instrumentation):
+    for receiver, call in _receiver_calls(task):
+        start_time = timeit.default_timer()
+        try:
+            if asyncio.iscoroutinefunction(receiver):
+                await call()
+            else:
+                await sync_to_async(call)()
+        except Exception as exc:
+            instrumentation.post_receiver(
+                task,
+                receiver,
+                timeit.default_timer() - start_time,
+                exc,
+            )
+            raise
+        instrumentation.post_receiver(
+            task,
+            receiver,
+            timeit.default_timer() - start_time,
+            None,
+        )
+
+
+def dispatch(task, instrumentation=None):
+    """
+    Execute the handler of the task, falling back to the receivers of `future_task_signal`.
+
+    If an `instrumentation` is given, the receivers are called one by one, so the time each of them takes can be passed
+    to its `post_receiver` hook.
+    """
+    if instrumentation is not None:
+        return _dispatch_instrumented(task, instrumentation)
+
+    handler = _handlers.get(task.type)
+    if handler is not None:
+        if asyncio.iscoroutinefunction(handler):
+            return asyncio.run(handler(task))
+        return handler(task)
+
+    _check_receivers(task)
+    future_task_signal.send(sender=intern(task.type), instance=task)
+
+
+async def adispatch(task, instrumentation=None):
+    """Asynchronous version of `dispatch`, synchronous handlers are executed in a thread."""
+    if instrumentation is not None:
+        return await _adispatch_instrumented(task, instrumentation)
+
+    handler = _handlers.get(task.type)
+    if handler is not None:
+        if asyncio.iscoroutinefunction(handler):
+            return await handler(task)
+        return await sync_to_async(handler)(task)
+
+    _check_receivers(task)
+    if hasattr(future_task_signal, "asend"):
+        await future_task_signal.asend(sender=intern(task.type), instance=task)
+        return
+
+    # Before Django 5.0, signals cannot be sent asynchronously, so the coroutines returned by async receivers are
+    # awaited here.
+    responses = await sync_to_async(future_task_signal.send)(
+        sender=intern(task.type),
+        instance=task,
+    )
+    for _receiver, response in responses:
+        if asyncio.iscoroutine(response):
+            await response
@@ -0,0 +1,371 @@
+import asyncio
+import cProfile
+import pstats
+import random
+import threading
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+
+class Instrumentation:
+    """
+    Base class of the instrumentations of `process_future_tasks`, all hooks do nothing.
+
+    Instrumentations are configured as list of dotted paths in the `FUTURE_TASK_INSTRUMENTATIONS` setting. Their hooks
+    are called by all pool members (and in async mode by several tasks) concurrently, so they have to be thread-safe
+    and must not rely on the order of the hooks of different tasks.
+    """
+
+    def pre_claim(self, limit):
+        """Called before up to `limit` tasks get claimed."""
+
+    def post_claim(self, tasks, duration):
+        """Called after the `tasks` got claimed within `duration` seconds."""
+
+    def pre_dispatch(self, task):
+        """Called before the handler or signal receivers of the task are executed."""
+
+    def post_receiver(self, task, receiver, duration, exception):
+        """Called after the handler or signal receiver `receiver` ran for `duration` seconds (or raised `exception`)."""
+
+    def post_dispatch(self, task, duration):
+        """Called after the task has been executed within `duration` seconds, with its status and result set."""
+
+    def post_persist(self, tasks, duration):
+        """Called after the completed `tasks` got written to the database within `duration` seconds."""
+
+
+class CompositeInstrumentation(Instrumentation):
+    """Calls the hooks of several instrumentations in order."""
+
+    def __init__(self, instrumentations):
+        self.instrumentations = instrumentations
+
+    def pre_claim(self, limit):
+        for instrumentation in self.instrumentations:
+            instrumentation.pre_claim(limit)
+
+    def post_claim(self, tasks, duration):
+        for instrumentation in self.instrumentations:
+            instrumentation.post_claim(tasks, duration)
+
+    def pre_dispatch(self, task):
+        for instrumentation in self.instrumentations:
+            instrumentation.pre_dispatch(task)
+
+    def post_receiver(self, task, receiver, duration, exception):
+        for instrumentation in self.instrumentations:
+            instrumentation.post_receiver(task, receiver, duration, exception)
+
+    def post_dispatch(self, task, duration):
+        for instrumentation in self.instrumentations:
+            instrumentation.post_dispatch(task, duration)
+
+    def post_persist(self, tasks, duration):
+        for instrumentation in self.instrumentations:
+            instrumentation.post_persist(tasks, duration)
+
+
+def get_instrumentation():
+    """Return the instrumentations configured by `FUTURE_TASK_INSTRUMENTATIONS` or `None` if there are none."""
+    instrumentations = [
+        import_string(path)()
+        for path in getattr(settings, "FUTURE_TASK_INSTRUMENTATIONS", [])
+    ]
+    if not instrumentations:
+        return None
+    if len(instrumentations) == 1:
+        return instrumentations[0]
+    return CompositeInstrumentation(instrumentations)
+
+
+class Span:
+    """A finished or running span, following the data model of OpenTelemetry (times in nanoseconds since the epoch)."""
+
+    STATUS_OK = "OK"
+    STATUS_ERROR = "ERROR"
+
+    def __init__(
+        self,
+        name,
+        trace_id=None,
+        parent_id=None,
+        attributes=None,
+        start_time=None,
+    ):
+        self.name = name
+        self.trace_id = trace_id if trace_id is not None else random.getrandbits(128)
+        self.span_id = random.getrandbits(64)
+        self.parent_id = parent_id
+        self.attributes = attributes or {}
+        self.start_time = start_time if start_time is not None else time.time_ns()
+        self.end_time = None
+        self.status = self.STATUS_OK
+
+    def child(self, name, attributes=None, start_time=None):
+        return Span(
+            name,
+            trace_id=self.trace_id,
+            parent_id=self.span_id,
+            attributes=attributes,
+            start_time=start_time,
+        )
+
+    def end(self, status=STATUS_OK, end_time=None):
+        self.status = status
+        self.end_time = end_time if end_time is not None else time.time_ns()
+
+
+class NoopSpanExporter:
+    """Discards all spans."""
+
+    def export(self, spans):
+        pass
+
+
+class InMemorySpanExporter:
+    """Keeps all spans in memory, e.g. for tests."""
+
+    def __init__(self):
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def export(self, spans):
+        with self._lock:
+            self.spans.extend(spans)
+
+
+class OpenTelemetrySpanExporter:
+    """Replays the spans with the tracer of OpenTelemetry, which requires the `opentelemetry-api` package."""
+
+    def __init__(self):
+        try:
+            from opentelemetry import trace
+        except ImportError:
+            raise ImproperlyConfigured(
+                "The OpenTelemetrySpanExporter requires the opentelemetry-api package",
+            ) from None
+
+        self._trace = trace
+        self._tracer = trace.get_tracer("django_future_tasks")
+
+    def export(self, spans):
+        # Parents are exported before their children.
+        otel_spans = {}
+        for span in spans:
+            parent = otel_spans.get(span.parent_id)
+            otel_spans[span.span_id] = self._tracer.start_span(
+                span.name,
+                context=self._trace.set_span_in_context(parent) if parent else None,
+                attributes=span.attributes,
+                start_time=span.start_time,
+            )
+        for span in reversed(spans):
+            otel_span = otel_spans[span.span_id]
+            if span.status == Span.STATUS_ERROR:
+                otel_span.set_status(
+                    self._trace.Status(self._trace.StatusCode.ERROR),
+                )
+            otel_span.end(end_time=span.end_time)
+
+
+def _duration_ns(duration):
+    return int(duration * 1_000_000_000)
+
+
+class TracingInstrumentation(Instrumentation):
+    """
+    Emits spans for claiming, dispatching (with a child span per receiver) and persisting tasks.
+
+    The spans are passed to the exporter configured by the `FUTURE_TASK_SPAN_EXPORTER` setting (default:
+    `NoopSpanExporter`).
+    """
+
+    def __init__(self, exporter=None):
+        if exporter is None:
+            exporter_path = getattr(
+                settings,
+                "FUTURE_TASK_SPAN_EXPORTER",
+                "django_future_tasks.instrumentation.NoopSpanExporter",
+            )
+            exporter = import_string(exporter_path)()
+        self.exporter = exporter
+        self._lock = threading.Lock()
+        # The span of each task in dispatch and the spans of its receivers.
+        self._task_spans = {}
+
+    def post_claim(self, tasks, duration):
+        end_time = time.time_ns()
+        span = Span(
+            "future_task.claim",
+            attributes={"future_task.count": len(tasks)},
+            start_time=end_time - _duration_ns(duration),
+        )
+        span.end(end_time=end_time)
+        self.exporter.export([span])
+
+    def pre_dispatch(self, task):
+        span = Span(
+            "future_task.dispatch",
+            attributes={
+                "future_task.task_id": task.task_id,
+                "future_task.type": task.type,
+            },
+        )
+        with self._lock:
+            self._task_spans[task.pk] = [span]
+
+    def post_receiver(self, task, receiver, duration, exception):
+        end_time = time.time_ns()
+        with self._lock:
+            spans = self._task_spans.get(task.pk)
+        if spans is None:
+            return
+
+        span = spans[0].child(
+            "future_task.receiver",
+            attributes={
+                "future_task.receiver": f"{receiver.__module__}.{receiver.__qualname__}",
+            },
+            start_time=end_time - _duration_ns(duration),
+        )
+        span.end(
+            status=Span.STATUS_OK if exception is None else Span.STATUS_ERROR,
+            end_time=end_time,
+        )
+        spans.append(span)
+
+    def post_dispatch(self, task, duration):
+        from django_future_tasks.models import FutureTask
+
+        with self._lock:
+            spans = self._task_spans.pop(task.pk, None)
+        if spans is None:
+            return
+
+        spans[0].attributes["future_task.status"] = task.status
+        spans[0].end(
+            status=(
+                Span.STATUS_OK
+                if task.status == FutureTask.FUTURE_TASK_STATUS_DONE
+                else Span.STATUS_ERROR
+            ),
+        )
+        self.exporter.export(spans)
+
+    def post_persist(self, tasks, duration):
+        end_time = time.time_ns()
+        span = Span(
+            "future_task.persist",
+            attributes={"future_task.count": len(tasks)},
+            start_time=end_time - _duration_ns(duration),
+        )
+        span.end(end_time=end_time)
+        self.exporter.export([span])
+
+
+class ProfilingInstrumentation(Instrumentation):
+    """
+    Profiles a sample of the tasks with cProfile (and optionally tracemalloc).
+
+    If a profiled task takes at least `threshold` seconds, a summary of the `limit` functions with the highest
+    cumulative time (and the peak of the memory allocated meanwhile) is attached to its result as `profile`. The options
+    are configured by the `FUTURE_TASK_PROFILING` setting. Memory tracing is process-wide, so the memory peak is only
+    accurate if a single task is processed at a time. It is only active while tasks are profiled.
+
+    Tasks processed in async mode are not profiled, as the concurrent tasks share a thread and therefore a profiler.
+    """
+
+    def __init__(self, sample_rate=1.0, threshold=1.0, limit=10, memory=False):
+        options = getattr(settings, "FUTURE_TASK_PROFILING", {})
+        self.sample_rate = options.get("sample_rate", sample_rate)
+        self.threshold = options.get("threshold", threshold)
+        self.limit = options.get("limit", limit)
+        self.memory = options.get("memory", memory)
+        self._lock = threading.Lock()
+        self._profiles = {}
+        # Whether memory tracing has been started by this instrumentation, so it is stopped again.
+        self._tracing_memory = False
+
+    @staticmethod
+    def _in_event_loop():
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+        return True
+
+    def pre_dispatch(self, task):
+        if random.random() >= self.sample_rate or self._in_event_loop():
+            return
+
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Since Python 3.12, only one profiler can be active at a time, e.g. not for tasks of other pool threads.
+            return
+        with self._lock:
+            self._profiles[task.pk] = profile
+            if self.memory:
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start()
+                    self._tracing_memory = True
+                tracemalloc.reset_peak()
+
+    def post_dispatch(self, task, duration):
+        with self._lock:
+            profile = self._profiles.pop(task.pk, None)
+            if profile is None:
+                return
+
+            memory_peak = None
+            if self.memory and tracemalloc.is_tracing():
+                memory_peak = tracemalloc.get_traced_memory()[1]
+                if self._tracing_memory and not self._profiles:
+                    tracemalloc.stop()
+                    self._tracing_memory = False
+
+        profile.disable()
+        if duration < self.threshold:
+            return
+
+        summary = {
+            "duration": duration,
+            "functions": self._summarize(profile),
+        }
+        if memory_peak is not None:
+            summary["memory_peak"] = memory_peak
+
+        # The result has not been loaded, if it has not been set by the task.
+        if "result" in task.get_deferred_fields() or task.result is None:
+            task.result = {}
+        if isinstance(task.result, dict):
+            task.result["profile"] = summary
+
+    def _summarize(self, profile):
+        stats = pstats.Stats(profile).stats
+        functions = sorted(
+            stats.items(),
+            key=lambda item: item[1][3],
+            reverse=True,
+        )[: self.limit]
+        return [
+            {
+                "function": f"{filename}:{line}({name})",
+                "calls": calls,
+                "total_time": total_time,
+                "cumulative_time": cumulative_time,
+            }
+            for (filename, line, name), (
+                _primitive_calls,
+                calls,
+                total_time,
+                cumulative_time,
+                _callers,
+            ) in functions
+        ]
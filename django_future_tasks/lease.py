@@ -0,0 +1,40 @@
+import os
+import socket
+from datetime import timedelta
+
+from django.utils import timezone
+
+from django_future_tasks.dedup import reopen_tasks
+from django_future_tasks.models import FutureTask
+
+DEFAULT_LEASE_DURATION = 300
+
+
+def get_worker_id():
+    """Return the identifier of this process, which is stored in the `locked_by` field of the claimed tasks."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def renew_leases(task_pks, worker_id, duration):
+    """Extend the leases of the given tasks held by `worker_id` by `duration` seconds from now."""
+    return FutureTask.objects.filter(
+        pk__in=task_pks,
+        locked_by=worker_id,
+        status=FutureTask.FUTURE_TASK_STATUS_IN_PROGRESS,
+    ).update(lease_expires_at=timezone.now() + timedelta(seconds=duration))
+
+
+def reap_expired_leases(status=FutureTask.FUTURE_TASK_STATUS_OPEN):
+    """
+    Set the tasks in progress with an expired lease to `status` in bulk and return their number.
+
+    The lease of a task expires if its worker died without marking it as interrupted (e.g. because it got killed).
+    Tasks superseded by an open task with the same deduplication key are marked as interrupted instead of open.
+    """
+    expired_tasks = FutureTask.objects.filter(
+        status=FutureTask.FUTURE_TASK_STATUS_IN_PROGRESS,
+        lease_expires_at__lt=timezone.now(),
+    )
+    if status == FutureTask.FUTURE_TASK_STATUS_OPEN:
+        return reopen_tasks(expired_tasks, locked_by=None, lease_expires_at=None)
+    return expired_tasks.update(status=status, locked_by=None, lease_expires_at=None)
@@ -0,0 +1,86 @@
+import math
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+
+from django_future_tasks.models import FutureTask, FutureTaskTokenBucket
+
+RATE_PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_rate(rate):
+    """Parse a rate like `"50/s"`, `"100/m"`, `"1000/h"` or `"10000/d"` and return the number and the period in seconds."""
+    try:
+        number, period = rate.split("/")
+        return int(number), RATE_PERIODS[period]
+    except (AttributeError, KeyError, ValueError):
+        raise ImproperlyConfigured(
+            f"Invalid rate '{rate}', expected e.g. '50/s', '100/m', '1000/h' or '10000/d'",
+        ) from None
+
+
+class TaskLimit:
+    """
+    Rate and concurrency limit of a task type, enforced across all workers.
+
+    The rate is limited by a token bucket, which holds up to `burst` tokens (default: the number of the rate) and is
+    refilled continuously according to the `rate`. Each claimed task takes one token. At most `concurrency` tasks of the
+    type are in progress at the same time.
+    """
+
+    def __init__(self, rate=None, concurrency=None, burst=None):
+        self.rate = None
+        self.burst = burst
+        if rate is not None:
+            number, period = parse_rate(rate)
+            self.rate = number / period
+            if self.burst is None:
+                self.burst = number
+        self.concurrency = concurrency
+
+    def seconds_until_token(self, tokens):
+        """Return the number of seconds until the bucket holding `tokens` tokens holds a whole token again."""
+        return (1 - tokens % 1) / self.rate
+
+    def acquire(self, task_type, limit, now=None):
+        """
+        Return the number of tasks of `task_type` which may be claimed now (at most `limit`) and the token bucket.
+
+        Must be called in a transaction, which has to take the claimed tokens by `release`. The token bucket is locked
+        until the end of the transaction (on databases supporting `SELECT ... FOR UPDATE`), so the limits hold across
+        concurrently claiming workers.
+        """
+        now = now or timezone.now()
+        bucket, _created = (
+            FutureTaskTokenBucket.objects.select_for_update().get_or_create(
+                type=task_type,
+                defaults={"tokens": self.burst or 0, "updated_at": now},
+            )
+        )
+        if self.rate is not None:
+            elapsed = max((now - bucket.updated_at).total_seconds(), 0)
+            bucket.tokens = min(self.burst, bucket.tokens + elapsed * self.rate)
+            bucket.updated_at = now
+            limit = min(limit, math.floor(bucket.tokens))
+        if self.concurrency is not None and limit > 0:
+            in_progress = FutureTask.objects.filter(
+                type=task_type,
+                status=FutureTask.FUTURE_TASK_STATUS_IN_PROGRESS,
+            ).count()
+            limit = min(limit, max(self.concurrency - in_progress, 0))
+        return limit, bucket
+
+    def release(self, bucket, claimed):
+        """Take a token per claimed task from the bucket."""
+        if self.rate is not None:
+            bucket.tokens -= claimed
+            bucket.save(update_fields=["tokens", "updated_at"])
+
+
+def get_limits():
+    """Return the limits configured per task type in `FUTURE_TASK_LIMITS`."""
+    return {
+        task_type: TaskLimit(**options)
+        for task_type, options in getattr(settings, "FUTURE_TASK_LIMITS", {}).items()
+    }
@@ -1,30 +1,79 @@
 import logging
 import signal
 import time
+import timeit
 
-from croniter import croniter_range
 from django import db
-from django.core.management.base import BaseCommand
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import F, Q
 from django.utils import timezone
 
+from django_future_tasks.cron import cron_range, next_execution
+from django_future_tasks.metrics import get_metrics_backend, serve_metrics
 from django_future_tasks.models import FutureTask, PeriodicFutureTask
 
 logger = logging.getLogger("populate_periodic_future_tasks")
 
+BULK_CREATE_BATCH_SIZE = 1000
+
 
 class Command(BaseCommand):
     help = "Create single future tasks based on periodic future tasks from database"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--shard",
+            default=None,
+            help="Only process the periodic tasks of the given shard, formatted as <index>/<number of shards> "
+            "(e.g. 0/2 and 1/2 for two commands splitting the work)",
+        )
+        parser.add_argument(
+            "--metrics-port",
+            type=int,
+            default=None,
+            help="Serve the metrics at /metrics on the given port",
+        )
+
     def _handle_termination(self, *args, **kwargs):
         self._running = False
 
-    def _handle_options(self):
-        # Currently, no other options are given.
-        self.tick = 1
-
     @staticmethod
-    def periodic_tasks_for_processing():
-        return PeriodicFutureTask.objects.filter(is_active=True)
+    def _parse_shard(shard):
+        try:
+            index, number_of_shards = (int(value) for value in shard.split("/"))
+        except ValueError:
+            raise CommandError(
+                f"Invalid shard '{shard}', expected <index>/<number of shards>",
+            ) from None
+        if not 0 <= index < number_of_shards:
+            raise CommandError(
+                f"Invalid shard '{shard}', the index has to be between 0 and {number_of_shards - 1}",
+            )
+        return index, number_of_shards
+
+    def _handle_options(self, options):
+        self.tick = 1
+        self.bulk_create_batch_size = BULK_CREATE_BATCH_SIZE
+        if options["shard"] is not None:
+            self.shard = self._parse_shard(options["shard"])
+        self.metrics_port = options["metrics_port"]
+
+    def active_periodic_tasks(self):
+        periodic_tasks = PeriodicFutureTask.objects.filter(is_active=True)
+        if self.shard is not None:
+            # Each periodic task belongs to exactly one shard, based on its primary key.
+            index, number_of_shards = self.shard
+            periodic_tasks = periodic_tasks.alias(
+                shard=F("pk") % number_of_shards,
+            ).filter(shard=index)
+        return periodic_tasks
+
+    def periodic_tasks_for_processing(self, now):
+        # Periodic tasks without a next run have been created before it was introduced and need to be processed once.
+        return self.active_periodic_tasks().filter(
+            Q(next_run_at__isnull=True) | Q(next_run_at__lte=now),
+        )
 
     @staticmethod
     def number_of_corresponding_single_tasks(p_task):
@@ -32,7 +81,7 @@ class Command(BaseCommand):
 
     def update_last_task_creation(self):
         now = timezone.now()
-        for p_task in self.periodic_tasks_for_processing():
+        for p_task in self.active_periodic_tasks():
             p_task.last_task_creation = now
             p_task.save()
 
@@ -40,46 +89,96 @@ class Command(BaseCommand):
     def _convert_exception_args(args):
         return [str(arg) for arg in args]
 
+    def tasks_to_create(self, p_task, now):
+        """
+        Return the (unsaved) single tasks of all occurrences of the given periodic task until now.
+
+        The periodic task gets deactivated (but not saved) if it reached its maximal number of executions or its end
+        time.
+        """
+        remaining_executions = None
+        if p_task.max_number_of_executions is not None:
+            remaining_executions = (
+                p_task.max_number_of_executions
+                - self.number_of_corresponding_single_tasks(p_task)
+            )
+
+        tasks = []
+        for dt in cron_range(p_task.cron_string, p_task.last_task_creation, now):
+            if (
+                remaining_executions is not None and len(tasks) >= remaining_executions
+            ) or (p_task.end_time is not None and p_task.end_time < dt):
+                p_task.is_active = False
+                break
+
+            dt_format = "%Y-%m-%d %H:%M:%S%z"
+            tasks.append(
+                FutureTask(
+                    task_id=f"{p_task.periodic_task_id} ({dt.strftime(dt_format)})",
+                    eta=dt,
+                    data=p_task.data,
+                    type=p_task.type,
+                    priority=p_task.priority,
+                    status=FutureTask.FUTURE_TASK_STATUS_OPEN,
+                    periodic_parent_task_id=p_task.pk,
+                ),
+            )
+        return tasks
+
     def handle_tick(self):
+        start_time = timeit.default_timer()
         now = timezone.now()
-        periodic_task_list = self.periodic_tasks_for_processing()
+        periodic_task_list = self.periodic_tasks_for_processing(now)
         logger.debug(
             f"Got {len(periodic_task_list)} periodic tasks for processing",
         )
 
         for p_task in periodic_task_list:
-            last_population = p_task.last_task_creation
-            relevant_dts = croniter_range(last_population, now, p_task.cron_string)
-
-            for dt in relevant_dts:
-                if (
-                    p_task.max_number_of_executions is not None
-                    and self.number_of_corresponding_single_tasks(p_task)
-                    >= p_task.max_number_of_executions
-                ) or (p_task.end_time is not None and p_task.end_time < dt):
-                    p_task.is_active = False
-                    break
-
-                dt_format = "%Y-%m-%d %H:%M:%S%z"
-                task_id = f"{p_task.periodic_task_id} ({dt.strftime(dt_format)})"
-                FutureTask.objects.create(
-                    task_id=task_id,
-                    eta=dt,
-                    data=p_task.data,
-                    type=p_task.type,
-                    status=FutureTask.FUTURE_TASK_STATUS_OPEN,
-                    periodic_parent_task_id=p_task.pk,
+            tasks = self.tasks_to_create(p_task, now)
+            # Tasks which already exist (e.g. created by a concurrently running command) are skipped.
+            FutureTask.objects.bulk_create(
+                tasks,
+                batch_size=self.bulk_create_batch_size,
+                ignore_conflicts=True,
+            )
+            if tasks:
+                logger.info(
+                    f"{len(tasks)} FutureTasks of {p_task.periodic_task_id} created",
+                )
+                self.metrics.increment(
+                    "future_tasks_created_total",
+                    len(tasks),
+                    {"type": p_task.type},
                 )
-                logger.info(f"FutureTask {task_id} created")
-
-            p_task.last_task_creation = now
-            p_task.save()
 
+            # Update the periodic task with a single query, without touching any field changed in the meantime.
+            changed_fields = {
+                "last_task_creation": now,
+                "next_run_at": next_execution(p_task.cron_string, now),
+            }
+            if not p_task.is_active:
+                changed_fields["is_active"] = False
+            PeriodicFutureTask.objects.filter(pk=p_task.pk).update(**changed_fields)
+
+        self.metrics.observe(
+            "future_task_tick_seconds",
+            timeit.default_timer() - start_time,
+            {"command": "populate_periodic_future_tasks"},
+        )
         time.sleep(self.tick)
 
     def handle(self, *args, **options):
         # Load given options.
-        self._handle_options()
+        self._handle_options(options)
+
+        metrics_server = None
+        if self.metrics_port is not None:
+            try:
+                self.metrics, metrics_server = serve_metrics(self.metrics_port)
+            except (ImproperlyConfigured, OSError) as exc:
+                raise CommandError(f"Cannot serve the metrics: {exc}") from exc
+
+        self.update_last_task_creation()
 
         while self._running:
             time.sleep(self.tick)
@@ -96,6 +195,9 @@ class Command(BaseCommand):
                 # create a new one on the next database access.
                 db.close_old_connections()
 
+        if metrics_server is not None:
+            metrics_server.shutdown()
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
@@ -104,9 +206,13 @@ class Command(BaseCommand):
         # command will finish a running tick and quit afterwards.
         self._running = True
 
+        # The shard as tuple of its index and the number of shards, if only a part of the periodic tasks is processed.
+        self.shard = None
+
+        self.metrics = get_metrics_backend()
+        self.metrics_port = None
+
         # Register system signal handler to gracefully quit the service when
         # getting a `SIGINT` or `SIGTERM` signal (e.g. by CTRL+C).
         signal.signal(signal.SIGINT, self._handle_termination)
         signal.signal(signal.SIGTERM, self._handle_termination)
-
-        self.update_last_task_creation()
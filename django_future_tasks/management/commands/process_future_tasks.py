@@ -1,26 +1,55 @@
+import asyncio
 import logging
+import multiprocessing
 import signal
-import sys
-import time
+import threading
 import timeit
 import traceback
-from sys import intern
+from datetime import timedelta
 
+from asgiref.sync import sync_to_async
 from django import db
-from django.core.management.base import BaseCommand
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+from django.db import router, transaction
+from django.db.models import Case, Value, When
 from django.utils import timezone
 
-from django_future_tasks.handlers import future_task_signal
+from django_future_tasks.completion import CompletionBuffer, write_task_completion
+from django_future_tasks.dedup import reopen_tasks
+from django_future_tasks.handlers import adispatch, dispatch
+from django_future_tasks.instrumentation import get_instrumentation
+from django_future_tasks.limits import get_limits
+from django_future_tasks.lease import (
+    DEFAULT_LEASE_DURATION,
+    get_worker_id,
+    reap_expired_leases,
+    renew_leases,
+)
+from django_future_tasks.metrics import get_metrics_backend, serve_metrics
 from django_future_tasks.models import FutureTask
+from django_future_tasks.pool import run_pool_process
+from django_future_tasks.prune import get_retention, prune_tasks
+from django_future_tasks.retry import handle_failure
+from django_future_tasks.schedule import DEFAULT_HORIZON, EtaSchedule
+from django_future_tasks.wakeup import MIN_POLL_INTERVAL, get_wakeup_backend
 
 logger = logging.getLogger("process_future_tasks")
 
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_FLUSH_INTERVAL = 100
+DEFAULT_MAX_INFLIGHT = 100
+# Number of seconds between two measurements of the number of due tasks, if metrics are enabled.
+METRICS_INTERVAL = 15
+
+POOL_THREAD = "thread"
+POOL_PROCESS = "process"
+
 
 class Command(BaseCommand):
     help = "Process future tasks from database"
 
-    current_task_pk = None
-
     def add_arguments(self, parser):
         parser.add_argument(
             "--onetimerun",
@@ -29,75 +58,791 @@ class Command(BaseCommand):
             default=False,
             help="Run command only one times",
         )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=None,
+            help="Maximal number of tasks claimed at once "
+            f"(default: FUTURE_TASK_BATCH_SIZE setting or {DEFAULT_BATCH_SIZE})",
+        )
+        parser.add_argument(
+            "--schedule-horizon",
+            type=float,
+            default=DEFAULT_HORIZON,
+            help="Number of seconds after which the in-memory schedule of upcoming tasks gets refreshed "
+            f"(default: {DEFAULT_HORIZON})",
+        )
+        parser.add_argument(
+            "--flush-size",
+            type=int,
+            default=1,
+            help="Number of completed tasks collected before writing them at once (default: 1, i.e. unbuffered)",
+        )
+        parser.add_argument(
+            "--flush-interval",
+            type=int,
+            default=DEFAULT_FLUSH_INTERVAL,
+            help="Maximal number of milliseconds completed tasks are collected before writing them "
+            f"(default: {DEFAULT_FLUSH_INTERVAL})",
+        )
+        parser.add_argument(
+            "--async",
+            action="store_true",
+            dest="async_mode",
+            help="Run an event loop and process up to --max-inflight tasks concurrently (intended for async receivers)",
+        )
+        parser.add_argument(
+            "--max-inflight",
+            type=int,
+            default=DEFAULT_MAX_INFLIGHT,
+            help=f"Maximal number of tasks processed concurrently in async mode (default: {DEFAULT_MAX_INFLIGHT})",
+        )
+        parser.add_argument(
+            "--priority-aging",
+            type=float,
+            default=None,
+            help="Number of seconds after which overdue tasks are claimed regardless of their priority "
+            "(default: FUTURE_TASK_PRIORITY_AGING setting or disabled)",
+        )
+        parser.add_argument(
+            "--lease-duration",
+            type=float,
+            default=None,
+            help="Number of seconds a claimed task is leased to this worker, the lease is renewed regularly "
+            f"(default: FUTURE_TASK_LEASE_DURATION setting or {DEFAULT_LEASE_DURATION})",
+        )
+        parser.add_argument(
+            "--expired-lease-status",
+            choices=[
+                FutureTask.FUTURE_TASK_STATUS_OPEN,
+                FutureTask.FUTURE_TASK_STATUS_INTERRUPTED,
+            ],
+            default=FutureTask.FUTURE_TASK_STATUS_OPEN,
+            help="Status of the tasks whose worker died, i.e. whose lease expired (default: open)",
+        )
+        parser.add_argument(
+            "--prune-interval",
+            type=float,
+            default=None,
+            help="Number of seconds after which completed tasks older than their retention (FUTURE_TASK_RETENTION "
+            "setting) are deleted regularly (default: disabled)",
+        )
+        parser.add_argument(
+            "--metrics-port",
+            type=int,
+            default=None,
+            help="Serve the metrics at /metrics on the given port (pool process i uses the port plus i)",
+        )
+        parser.add_argument(
+            "--types",
+            default=None,
+            help="Comma-separated list of the task types to process (default: all types)",
+        )
+        parser.add_argument(
+            "--exclude-types",
+            default=None,
+            help="Comma-separated list of the task types not to process",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=1,
+            help="Number of pool members claiming and processing tasks in parallel",
+        )
+        parser.add_argument(
+            "--pool",
+            choices=[POOL_THREAD, POOL_PROCESS],
+            default=POOL_THREAD,
+            help="Use threads or processes as pool members (only relevant for a concurrency greater than 1)",
+        )
 
     def _handle_termination(self, *args, **kwargs):
-        try:
-            current_task = FutureTask.objects.get(pk=self.current_task_pk)
-            current_task.status = FutureTask.FUTURE_TASK_STATUS_INTERRUPTED
-            current_task.save()
-        except FutureTask.DoesNotExist:
-            pass
+        if self._loop is not None:
+            # Database queries are not allowed within the event loop, so the in-flight tasks are cancelled and mark
+            # themselves as interrupted.
+            self._running = False
+            self._loop.call_soon_threadsafe(self._cancel_in_flight_futures)
+            self.wakeup.wake_up()
+            return
+
+        # Persist the tasks completed already before marking the remaining ones as interrupted.
+        if self.completion_buffer is not None:
+            self.completion_buffer.flush()
+
+        with self._in_flight_lock:
+            in_flight_task_pks = list(self.in_flight_task_pks)
+        # The tasks are still running, so they are written with their final status if they finish before the exit.
+        interrupted = FutureTask.objects.filter(
+            pk__in=in_flight_task_pks,
+            locked_by=self.worker_id,
+            status=FutureTask.FUTURE_TASK_STATUS_IN_PROGRESS,
+        ).update(status=FutureTask.FUTURE_TASK_STATUS_INTERRUPTED)
+        self.metrics.increment("future_tasks_interrupted_total", interrupted)
+
+        # Pool processes handle their in-flight tasks by themselves.
+        for process in self._pool_processes:
+            if process.is_alive():
+                process.terminate()
+
         self._running = False
+        self.wakeup.wake_up()
+
+    @staticmethod
+    def _parse_types(value):
+        if value is None:
+            return None
+        types = [
+            task_type.strip() for task_type in value.split(",") if task_type.strip()
+        ]
+        known_types = {task_type for task_type, _label in settings.FUTURE_TASK_TYPES}
+        unknown_types = [
+            task_type for task_type in types if task_type not in known_types
+        ]
+        if unknown_types:
+            raise CommandError(
+                "Unknown task types: {}".format(", ".join(unknown_types)),
+            )
+        return types
 
     def _handle_options(self, options):
-        self.tick = 1
         self.one_time_run = options["onetimerun"]
+        if options["batch_size"] is not None:
+            self.batch_size = options["batch_size"]
+        if self.batch_size < 1:
+            raise CommandError("The batch size has to be a positive number")
+        self.schedule_horizon = options["schedule_horizon"]
+        if self.schedule_horizon <= 0:
+            raise CommandError("The schedule horizon has to be a positive number")
+        self.flush_size = options["flush_size"]
+        if self.flush_size < 1:
+            raise CommandError("The flush size has to be a positive number")
+        self.flush_interval = options["flush_interval"]
+        if self.flush_size > 1:
+            self.completion_buffer = CompletionBuffer(
+                self.flush_size,
+                self.flush_interval / 1000,
+                self.instrumentation,
+                self.worker_id,
+            )
+        self.concurrency = options["concurrency"]
+        if self.concurrency < 1:
+            raise CommandError("The concurrency has to be a positive number")
+        self.pool = options["pool"]
+        if options["priority_aging"] is not None:
+            self.priority_aging = options["priority_aging"]
+        if self.priority_aging is not None and self.priority_aging < 0:
+            raise CommandError("The priority aging must not be negative")
+        if options["lease_duration"] is not None:
+            self.lease_duration = options["lease_duration"]
+        if self.lease_duration <= 0:
+            raise CommandError("The lease duration has to be a positive number")
+        self.expired_lease_status = options["expired_lease_status"]
+        self.prune_interval = options["prune_interval"]
+        if self.prune_interval is not None and self.prune_interval <= 0:
+            raise CommandError("The prune interval has to be a positive number")
+        self.metrics_port = options["metrics_port"]
+        self.types = self._parse_types(options["types"])
+        self.exclude_types = self._parse_types(options["exclude_types"])
+        self.async_mode = options["async_mode"]
+        self.max_inflight = options["max_inflight"]
+        if self.max_inflight < 1:
+            raise CommandError(
+                "The maximal number of in-flight tasks has to be a positive number",
+            )
+        if self.async_mode and self.concurrency > 1 and self.pool == POOL_THREAD:
+            raise CommandError(
+                "The async mode cannot be combined with a thread pool, use --max-inflight instead",
+            )
 
-    @staticmethod
-    def tasks_for_processing():
-        return FutureTask.objects.filter(
-            eta__lte=timezone.now(),
-            status=FutureTask.FUTURE_TASK_STATUS_OPEN,
-        ).order_by("eta")
+    def future_tasks(self):
+        """Return the tasks of the types processed by this command."""
+        queryset = FutureTask.objects.all()
+        if self.types is not None:
+            queryset = queryset.filter(type__in=self.types)
+        if self.exclude_types is not None:
+            queryset = queryset.exclude(type__in=self.exclude_types)
+        return queryset
+
+    def tasks_for_processing(self):
+        return (
+            self.future_tasks()
+            .filter(
+                eta__lte=timezone.now(),
+                status=FutureTask.FUTURE_TASK_STATUS_OPEN,
+            )
+            .order_by("priority", "eta")
+        )
+
+    def aged_tasks_for_processing(self):
+        """
+        Return the tasks overdue by more than `priority_aging` seconds.
+
+        They are still ordered by their priority, so the priorities keep mattering while catching up on a backlog.
+        """
+        return (
+            self.future_tasks()
+            .filter(
+                eta__lte=timezone.now() - timedelta(seconds=self.priority_aging),
+                status=FutureTask.FUTURE_TASK_STATUS_OPEN,
+            )
+            .order_by("priority", "eta")
+        )
+
+    def claim_tasks(self, limit=None):
+        """
+        Mark up to `limit` (default: `batch_size`) tasks due for processing as in progress and return them.
+
+        Tasks with a lower priority are claimed first. If `priority_aging` is set, the tasks overdue by more than
+        `priority_aging` seconds are claimed before all others, so tasks with a high priority value still make
+        progress (among them, tasks with a lower priority are claimed first as well). Tasks of the types limited by
+        `FUTURE_TASK_LIMITS` are only claimed as far as their limits allow. The tasks are returned in the order they
+        are to be processed, i.e. the overdue ones first.
+        """
+        limit = limit or self.batch_size
+        if self.instrumentation is not None:
+            self.instrumentation.pre_claim(limit)
+        start_time = timeit.default_timer()
+        querysets = [self.tasks_for_processing()]
+        if self.priority_aging is not None:
+            querysets.insert(0, self.aged_tasks_for_processing())
+
+        self.next_token_at = None
+        claimed_pks = []
+        # Limited task types are claimed first, as their share of the batch is bounded by their limits anyway.
+        for task_type, task_limit in self.limits.items():
+            if len(claimed_pks) < limit:
+                claimed_pks += self._claim_limited(
+                    querysets,
+                    task_type,
+                    task_limit,
+                    limit - len(claimed_pks),
+                )
+        if self.limits:
+            querysets = [
+                queryset.exclude(type__in=self.limits) for queryset in querysets
+            ]
+        for queryset in querysets:
+            if len(claimed_pks) < limit:
+                claimed_pks += self._claim(
+                    queryset.values_list("pk", flat=True)[: limit - len(claimed_pks)],
+                )
+
+        # The result is written by the task execution only, so there is no need to load it.
+        tasks = list(
+            FutureTask.objects.filter(pk__in=claimed_pks)
+            .defer("result")
+            .order_by(*self._processing_order()),
+        )
+        with self._in_flight_lock:
+            self.claimed_task_pks.update(claimed_pks)
+        if self.instrumentation is not None:
+            self.instrumentation.post_claim(tasks, timeit.default_timer() - start_time)
+        if self.metrics.enabled:
+            for task in tasks:
+                self.metrics.increment(
+                    "future_tasks_claimed_total",
+                    labels={"type": task.type},
+                )
+        return tasks
+
+    def _processing_order(self):
+        if self.priority_aging is None:
+            return ["priority", "eta"]
+        # The overdue tasks have been claimed before all others, so they are processed before all others as well.
+        overdue = Case(
+            When(
+                eta__lte=timezone.now() - timedelta(seconds=self.priority_aging),
+                then=Value(0),
+            ),
+            default=Value(1),
+        )
+        return [overdue, "priority", "eta"]
+
+    def _claim_limited(self, querysets, task_type, task_limit, limit):
+        """
+        Claim up to `limit` due tasks of `task_type` from `querysets`, as far as the limit of the type allows.
+
+        Due tasks exceeding the limit are not claimed, but left open for later claims (of any worker). If the rate limit
+        has been hit, `next_token_at` is set to the time the next task can be claimed.
+        """
+        querysets = [queryset.filter(type=task_type) for queryset in querysets]
+        # Most of the time, no task of a limited type is due, so the token bucket is not locked needlessly.
+        if not querysets[-1].exists():
+            return []
+
+        now = timezone.now()
+        with transaction.atomic(using=router.db_for_write(FutureTask)):
+            allowed, bucket = task_limit.acquire(task_type, limit, now)
+            claimed_pks = []
+            for queryset in querysets:
+                if len(claimed_pks) < allowed:
+                    claimed_pks += self._claim(
+                        queryset.values_list("pk", flat=True)[
+                            : allowed - len(claimed_pks)
+                        ],
+                    )
+            task_limit.release(bucket, len(claimed_pks))
+
+        if (
+            task_limit.rate is not None
+            and bucket.tokens < 1
+            and len(claimed_pks) < limit
+        ):
+            next_token_at = now + timedelta(
+                seconds=task_limit.seconds_until_token(bucket.tokens),
+            )
+            if self.next_token_at is None or next_token_at < self.next_token_at:
+                self.next_token_at = next_token_at
+        return claimed_pks
+
+    def _claim(self, task_pks):
+        """
+        Mark the tasks of `task_pks` as in progress and return the primary keys of the ones claimed by this command.
+
+        If the database supports `SELECT ... FOR UPDATE SKIP LOCKED`, the due rows are locked and claimed with a single
+        `UPDATE`, so concurrently running workers never claim the same task. Otherwise (e.g. on SQLite), each task is
+        claimed by a compare-and-swap `UPDATE ... WHERE status = 'open'` and skipped if another worker was faster.
+        """
+        using = router.db_for_write(FutureTask)
+        claim_fields = {
+            "status": FutureTask.FUTURE_TASK_STATUS_IN_PROGRESS,
+            "locked_by": self.worker_id,
+            "lease_expires_at": timezone.now() + timedelta(seconds=self.lease_duration),
+        }
+        if db.connections[using].features.has_select_for_update_skip_locked:
+            with transaction.atomic(using=using):
+                claimed_pks = list(task_pks.select_for_update(skip_locked=True))
+                FutureTask.objects.filter(pk__in=claimed_pks).update(**claim_fields)
+            return claimed_pks
+
+        return [
+            pk
+            for pk in task_pks
+            if FutureTask.objects.filter(
+                pk=pk,
+                status=FutureTask.FUTURE_TASK_STATUS_OPEN,
+            ).update(**claim_fields)
+        ]
+
+    def wait_for_tasks(self, schedule, poll_interval, generation):
+        """
+        Wait until the next scheduled task is due, the poll interval passed or a wakeup notification arrives.
+        """
+        now = timezone.now()
+        timeout = min(
+            poll_interval,
+            max(schedule.seconds_until_next(now), MIN_POLL_INTERVAL),
+        )
+        if self.next_token_at is not None:
+            # Rate limited tasks are due already, so they are not part of the schedule.
+            timeout = min(
+                timeout,
+                max((self.next_token_at - now).total_seconds(), MIN_POLL_INTERVAL),
+            )
+        if self.wakeup.wait(timeout, generation):
+            # New tasks might have arrived, which are not part of the schedule yet.
+            schedule.invalidate()
 
     @staticmethod
     def _convert_exception_args(args):
         return [str(arg) for arg in args]
 
+    def _exception_result(self, exc):
+        return {
+            "exception": "An exception of type {} occurred.".format(
+                type(exc).__name__,
+            ),
+            "args": self._convert_exception_args(exc.args),
+            "traceback": traceback.format_exception(
+                type(exc),
+                exc,
+                exc.__traceback__,
+                limit=None,
+                chain=None,
+            ),
+        }
+
     def handle_tick(self):
-        task_list = self.tasks_for_processing()
-        logger.debug(f"Got {len(task_list)} tasks for processing")
+        # Claim and process the due tasks batch by batch, until a batch is not filled up anymore.
+        number_of_tasks = 0
+        start_time = timeit.default_timer()
+        while self._running:
+            task_list = self.claim_tasks()
+            logger.debug(f"Got {len(task_list)} tasks for processing")
+
+            self.process_tasks(task_list)
+            number_of_tasks += len(task_list)
+            if len(task_list) < self.batch_size:
+                break
+
+        self.metrics.observe(
+            "future_task_tick_seconds",
+            timeit.default_timer() - start_time,
+            {"command": "process_future_tasks"},
+        )
+        return number_of_tasks
+
+    def process_tasks(self, task_list):
+        for i, task in enumerate(task_list):
+            if not self._running:
+                self.hand_back_tasks(task_list[i:])
+                break
 
-        for task in task_list:
-            task.status = FutureTask.FUTURE_TASK_STATUS_IN_PROGRESS
-            task.save()
-            self.current_task_pk = task.pk
             try:
+                self.execute_task(task)
+            except Exception:
+                # The lease of the failed task is not renewed anymore, so it is executed again once it expired. The
+                # remaining tasks are not left in progress until their leases expire.
+                with self._in_flight_lock:
+                    self.claimed_task_pks.discard(task.pk)
+                self.hand_back_tasks(task_list[i + 1 :])
+                raise
+
+    def hand_back_tasks(self, tasks):
+        """Hand the claimed, but not yet started tasks back to other workers."""
+        task_pks = [task.pk for task in tasks]
+        if not task_pks:
+            return
+        try:
+            reopen_tasks(
+                FutureTask.objects.filter(
+                    pk__in=task_pks,
+                    locked_by=self.worker_id,
+                    status=FutureTask.FUTURE_TASK_STATUS_IN_PROGRESS,
+                ),
+            )
+        finally:
+            # If the tasks cannot be reopened, their leases expire.
+            with self._in_flight_lock:
+                self.claimed_task_pks.difference_update(task_pks)
+
+    def execute_task(self, task):
+        with self._in_flight_lock:
+            self.in_flight_task_pks.add(task.pk)
+        self._record_start(task)
+        if task.attempts:
+            # The result of the previous, failed attempt has not been loaded, so it is not overwritten otherwise.
+            task.result = None
+        start_time = timeit.default_timer()
+        try:
+            dispatch(task, self.instrumentation)
+            task.execution_time = timeit.default_timer() - start_time
+            task.status = FutureTask.FUTURE_TASK_STATUS_DONE
+        except Exception as exc:
+            task.result = self._exception_result(exc)
+            logger.exception(exc)
+            self._handle_failure(task)
+        finally:
+            with self._in_flight_lock:
+                self.in_flight_task_pks.discard(task.pk)
+        if self.instrumentation is not None:
+            self.instrumentation.post_dispatch(
+                task,
+                timeit.default_timer() - start_time,
+            )
+        self._record_completion(task)
+        self.complete_task(task)
+
+    def _record_start(self, task):
+        if self.instrumentation is not None:
+            self.instrumentation.pre_dispatch(task)
+        if self.metrics.enabled:
+            self.metrics.observe(
+                "future_task_lag_seconds",
+                (timezone.now() - task.eta).total_seconds(),
+                {"type": task.type},
+            )
+
+    def _record_completion(self, task):
+        if not self.metrics.enabled:
+            return
+        if task.status == FutureTask.FUTURE_TASK_STATUS_OPEN:
+            status = "retry"
+        else:
+            status = task.status
+        self.metrics.increment(
+            "future_tasks_completed_total",
+            labels={"type": task.type, "status": status},
+        )
+        if task.status == FutureTask.FUTURE_TASK_STATUS_DONE:
+            self.metrics.observe(
+                "future_task_execution_seconds",
+                task.execution_time,
+                {"type": task.type},
+            )
+
+    def _handle_failure(self, task):
+        if handle_failure(task):
+            logger.info(
+                f"Retrying task {task.task_id} (attempt {task.attempts + 1}) at {task.eta}",
+            )
+            # The retry is not part of the schedule of upcoming tasks yet.
+            self.wakeup.wake_up()
+
+    def complete_task(self, task):
+        try:
+            if self.completion_buffer is not None:
+                # The lease of the buffered task is renewed as part of the buffer from now on.
+                self.completion_buffer.add(task)
+            else:
                 start_time = timeit.default_timer()
-                future_task_signal.send(sender=intern(task.type), instance=task)
-                task.execution_time = timeit.default_timer() - start_time
-                task.status = FutureTask.FUTURE_TASK_STATUS_DONE
-            except Exception as exc:
-                task.status = FutureTask.FUTURE_TASK_STATUS_ERROR
-                task.result = {
-                    "exception": "An exception of type {} occurred.".format(
-                        type(exc).__name__,
-                    ),
-                    "args": self._convert_exception_args(exc.args),
-                    "traceback": traceback.format_exception(
-                        *sys.exc_info(),
-                        limit=None,
-                        chain=None,
-                    ),
-                }
-                logger.exception(exc)
-            self.current_task_pk = None
-            task.save()
-
-        time.sleep(self.tick)
+                write_task_completion(task, self.worker_id)
+                if self.instrumentation is not None:
+                    self.instrumentation.post_persist(
+                        [task],
+                        timeit.default_timer() - start_time,
+                    )
+        finally:
+            # If the completion cannot be written, the lease expires and the task is executed again.
+            with self._in_flight_lock:
+                self.claimed_task_pks.discard(task.pk)
+
+    async def aexecute_task(self, task):
+        with self._in_flight_lock:
+            self.in_flight_task_pks.add(task.pk)
+        self._record_start(task)
+        if task.attempts:
+            # The result of the previous, failed attempt has not been loaded, so it is not overwritten otherwise.
+            task.result = None
+        start_time = timeit.default_timer()
+        try:
+            await adispatch(task, self.instrumentation)
+            task.execution_time = timeit.default_timer() - start_time
+            task.status = FutureTask.FUTURE_TASK_STATUS_DONE
+        except asyncio.CancelledError:
+            await FutureTask.objects.filter(
+                pk=task.pk,
+                locked_by=self.worker_id,
+                status=FutureTask.FUTURE_TASK_STATUS_IN_PROGRESS,
+            ).aupdate(status=FutureTask.FUTURE_TASK_STATUS_INTERRUPTED)
+            with self._in_flight_lock:
+                self.claimed_task_pks.discard(task.pk)
+            self.metrics.increment("future_tasks_interrupted_total")
+            raise
+        except Exception as exc:
+            task.result = self._exception_result(exc)
+            logger.exception(exc)
+            # The retry policy might query the database, which is not allowed within the event loop.
+            await sync_to_async(self._handle_failure)(task)
+        finally:
+            with self._in_flight_lock:
+                self.in_flight_task_pks.discard(task.pk)
+        if self.instrumentation is not None:
+            self.instrumentation.post_dispatch(
+                task,
+                timeit.default_timer() - start_time,
+            )
+        self._record_completion(task)
+        await self.acomplete_task(task)
+
+    async def acomplete_task(self, task):
+        try:
+            if self.completion_buffer is not None:
+                await sync_to_async(self.completion_buffer.add)(task)
+            else:
+                start_time = timeit.default_timer()
+                await sync_to_async(write_task_completion)(task, self.worker_id)
+                if self.instrumentation is not None:
+                    self.instrumentation.post_persist(
+                        [task],
+                        timeit.default_timer() - start_time,
+                    )
+        finally:
+            with self._in_flight_lock:
+                self.claimed_task_pks.discard(task.pk)
 
     def handle(self, *args, **options):
         # Load given options.
         self._handle_options(options)
 
+        if self.concurrency > 1 and self.pool == POOL_PROCESS:
+            # Pool processes renew the leases of their tasks and serve their metrics by themselves.
+            self._run_process_pool()
+            return
+
+        metrics_server = None
+        if self.metrics_port is not None:
+            try:
+                self.metrics, metrics_server = serve_metrics(self.metrics_port)
+            except (ImproperlyConfigured, OSError) as exc:
+                raise CommandError(f"Cannot serve the metrics: {exc}") from exc
+
+        heartbeat = threading.Thread(
+            target=self._run_heartbeat,
+            name="process_future_tasks-heartbeat",
+            daemon=True,
+        )
+        heartbeat.start()
+        # Pruning may take long, so it runs on its own thread to not delay the renewal of the leases.
+        pruner = None
+        if self.prune_interval is not None:
+            pruner = threading.Thread(
+                target=self._run_pruner,
+                name="process_future_tasks-pruner",
+                daemon=True,
+            )
+            pruner.start()
+        try:
+            if self.concurrency == 1 and self.async_mode:
+                asyncio.run(self._arun())
+            elif self.concurrency == 1:
+                self._run()
+            else:
+                self._run_thread_pool()
+        finally:
+            self._heartbeat_stop.set()
+            heartbeat.join()
+            if pruner is not None:
+                pruner.join()
+            if metrics_server is not None:
+                metrics_server.shutdown()
+
+    def heartbeat(self):
+        """Renew the leases of the claimed tasks and reset the tasks with an expired lease."""
+        # Tasks are moved from the claimed ones to the completion buffer, so they are looked up in this order.
+        with self._in_flight_lock:
+            claimed_task_pks = list(self.claimed_task_pks)
+        if self.completion_buffer is not None:
+            claimed_task_pks += self.completion_buffer.pending_pks()
+        if claimed_task_pks:
+            renew_leases(claimed_task_pks, self.worker_id, self.lease_duration)
+
+        number_of_tasks = reap_expired_leases(self.expired_lease_status)
+        if number_of_tasks:
+            logger.warning(
+                f"Set {number_of_tasks} tasks with an expired lease to {self.expired_lease_status}",
+            )
+
+        if self.metrics.enabled:
+            self.metrics.set("future_tasks_due", self.tasks_for_processing().count())
+
+    def prune(self):
+        """Delete the completed tasks older than their retention."""
+        number_of_tasks = prune_tasks(get_retention())
+        logger.info(f"Pruned {number_of_tasks} tasks")
+
+    def _run_heartbeat(self):
+        # The leases are renewed three times per lease duration, so a single failed heartbeat does not cost them.
+        interval = self.lease_duration / 3
+        if self.metrics.enabled:
+            interval = min(interval, METRICS_INTERVAL)
+        try:
+            while not self._heartbeat_stop.wait(interval):
+                try:
+                    self.heartbeat()
+                except Exception as exc:
+                    logger.exception(
+                        f"{exc.__class__.__name__} exception occurred...",
+                    )
+                    db.close_old_connections()
+        finally:
+            # The heartbeat thread uses its own database connection, which has to be closed explicitly.
+            db.connection.close()
+
+    def _run_pruner(self):
+        # The first run is one interval after the start, so restarting workers do not prune each time.
+        try:
+            while not self._heartbeat_stop.wait(self.prune_interval):
+                try:
+                    self.prune()
+                except Exception as exc:
+                    logger.exception(
+                        f"{exc.__class__.__name__} exception occurred...",
+                    )
+                    db.close_old_connections()
+        finally:
+            # The pruner thread uses its own database connection, which has to be closed explicitly.
+            db.connection.close()
+
+    def _run_thread_pool(self):
+        threads = [
+            threading.Thread(
+                target=self._run_pool_thread,
+                name=f"process_future_tasks-{i}",
+            )
+            for i in range(self.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def _run_pool_thread(self):
+        try:
+            self._run()
+        finally:
+            # Each thread uses its own database connection, which has to be closed explicitly.
+            db.connection.close()
+
+    def _run_process_pool(self):
+        # Spawn (instead of fork) the processes, so they do not share any database connection with this process.
+        context = multiprocessing.get_context("spawn")
+        options = {
+            "onetimerun": self.one_time_run,
+            "batch_size": self.batch_size,
+            "schedule_horizon": self.schedule_horizon,
+            "flush_size": self.flush_size,
+            "flush_interval": self.flush_interval,
+            "async_mode": self.async_mode,
+            "max_inflight": self.max_inflight,
+            "priority_aging": self.priority_aging,
+            "lease_duration": self.lease_duration,
+            "expired_lease_status": self.expired_lease_status,
+            "prune_interval": self.prune_interval,
+            "types": ",".join(self.types) if self.types is not None else None,
+            "exclude_types": (
+                ",".join(self.exclude_types) if self.exclude_types is not None else None
+            ),
+        }
+        self._pool_processes = [
+            context.Process(
+                target=run_pool_process,
+                args=(
+                    {
+                        **options,
+                        "metrics_port": (
+                            self.metrics_port + i
+                            if self.metrics_port is not None
+                            else None
+                        ),
+                    },
+                ),
+                name=f"process_future_tasks-{i}",
+            )
+            for i in range(self.concurrency)
+        ]
+        for process in self._pool_processes:
+            process.start()
+        for process in self._pool_processes:
+            process.join()
+
+    def _run(self):
+        # Poll quickly while there are tasks to process and back off while being idle.
+        poll_interval = MIN_POLL_INTERVAL
+        schedule = EtaSchedule(
+            horizon=self.schedule_horizon,
+            queryset=self.future_tasks(),
+        )
+
         while self._running:
-            time.sleep(self.tick)
+            generation = self.wakeup.generation
 
             try:
-                self.handle_tick()
+                if self.handle_tick():
+                    poll_interval = MIN_POLL_INTERVAL
+                else:
+                    poll_interval = min(
+                        2 * poll_interval,
+                        self.wakeup.max_poll_interval,
+                    )
+                # Do not keep completed tasks buffered while waiting.
+                if self.completion_buffer is not None:
+                    self.completion_buffer.flush()
                 if self.one_time_run:
                     break
 
+                self.wait_for_tasks(schedule, poll_interval, generation)
+
             except Exception as exc:
                 logger.exception(
                     f"{exc.__class__.__name__} exception occurred...",
@@ -106,6 +851,90 @@ class Command(BaseCommand):
                 # As the database connection might have failed, we discard it here, so django will
                 # create a new one on the next database access.
                 db.close_old_connections()
+                self.wakeup.wait(self.wakeup.max_poll_interval, generation)
+
+        # Persist the tasks completed before quitting.
+        if self.completion_buffer is not None:
+            self.completion_buffer.flush()
+
+    def _cancel_in_flight_futures(self):
+        for future in self._in_flight_futures:
+            future.cancel()
+
+    async def _arun(self):
+        self._loop = asyncio.get_running_loop()
+        poll_interval = MIN_POLL_INTERVAL
+        schedule = EtaSchedule(
+            horizon=self.schedule_horizon,
+            queryset=self.future_tasks(),
+        )
+
+        while self._running:
+            generation = self.wakeup.generation
+
+            try:
+                # Claim as many tasks as there are free slots.
+                limit = min(
+                    self.batch_size,
+                    self.max_inflight - len(self._in_flight_futures),
+                )
+                task_list = (
+                    await sync_to_async(self.claim_tasks)(limit) if limit else []
+                )
+                logger.debug(f"Got {len(task_list)} tasks for processing")
+                for task in task_list:
+                    future = asyncio.ensure_future(self.aexecute_task(task))
+                    self._in_flight_futures.add(future)
+                    future.add_done_callback(self._in_flight_futures.discard)
+
+                if task_list:
+                    poll_interval = MIN_POLL_INTERVAL
+                    if (
+                        len(task_list) == limit
+                        and len(self._in_flight_futures) < self.max_inflight
+                    ):
+                        # There might be more tasks due for processing.
+                        continue
+                elif not self._in_flight_futures:
+                    poll_interval = min(
+                        2 * poll_interval,
+                        self.wakeup.max_poll_interval,
+                    )
+                    if self.one_time_run:
+                        break
+
+                if self._in_flight_futures:
+                    # Wait for a free slot, but claim new tasks regularly.
+                    await asyncio.wait(
+                        self._in_flight_futures,
+                        timeout=poll_interval,
+                        return_when=asyncio.FIRST_COMPLETED,
+                    )
+                else:
+                    # Do not keep completed tasks buffered while waiting.
+                    if self.completion_buffer is not None:
+                        await sync_to_async(self.completion_buffer.flush)()
+                    await sync_to_async(self.wait_for_tasks)(
+                        schedule,
+                        poll_interval,
+                        generation,
+                    )
+
+            except Exception as exc:
+                logger.exception(
+                    f"{exc.__class__.__name__} exception occurred...",
+                )
+
+                # As the database connection might have failed, we discard it here, so django will
+                # create a new one on the next database access.
+                await sync_to_async(db.close_old_connections)()
+                await asyncio.sleep(self.wakeup.max_poll_interval)
+
+        # Let the in-flight tasks finish (or mark themselves as interrupted) and persist them before quitting.
+        if self._in_flight_futures:
+            await asyncio.wait(self._in_flight_futures)
+        if self.completion_buffer is not None:
+            await sync_to_async(self.completion_buffer.flush)()
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -115,6 +944,51 @@ class Command(BaseCommand):
         # command will finish a running tick and quit afterwards.
         self._running = True
 
+        # The primary keys of all tasks currently processed by this command (including all pool threads), so they
+        # can be marked as interrupted on termination.
+        self.in_flight_task_pks = set()
+        # The primary keys of all claimed tasks whose completion has not been handed to the completion buffer or
+        # written yet, including the ones waiting for execution, so their leases are renewed.
+        self.claimed_task_pks = set()
+        # A reentrant lock is required, as the termination signal handler may interrupt the main thread while it
+        # holds the lock.
+        self._in_flight_lock = threading.RLock()
+        self._pool_processes = []
+        self.completion_buffer = None
+        self.types = None
+        self.exclude_types = None
+        self.priority_aging = getattr(settings, "FUTURE_TASK_PRIORITY_AGING", None)
+
+        # Claimed tasks are leased to this worker and reset by other workers if the lease is not renewed in time.
+        self.worker_id = get_worker_id()
+        self.lease_duration = getattr(
+            settings,
+            "FUTURE_TASK_LEASE_DURATION",
+            DEFAULT_LEASE_DURATION,
+        )
+        self.expired_lease_status = FutureTask.FUTURE_TASK_STATUS_OPEN
+        # Stops the heartbeat and pruner threads.
+        self._heartbeat_stop = threading.Event()
+        self.prune_interval = None
+        self.metrics = get_metrics_backend()
+        self.metrics_port = None
+        self.instrumentation = get_instrumentation()
+        # The rate and concurrency limits per task type and the time the next rate limited task can be claimed.
+        self.limits = get_limits()
+        self.next_token_at = None
+
+        # The event loop and the futures of the in-flight tasks in async mode.
+        self._loop = None
+        self._in_flight_futures = set()
+
+        self.wakeup = get_wakeup_backend(router.db_for_write(FutureTask))
+
+        self.batch_size = getattr(
+            settings,
+            "FUTURE_TASK_BATCH_SIZE",
+            DEFAULT_BATCH_SIZE,
+        )
+
         # Register system signal handler to gracefully quit the service when
         # getting a `SIGINT` or `SIGTERM` signal (e.g. by CTRL+C).
         signal.signal(signal.SIGINT, self._handle_termination)
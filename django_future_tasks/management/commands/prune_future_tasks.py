@@ -0,0 +1,66 @@
+import gzip
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+
+from django_future_tasks.models import FutureTask
+from django_future_tasks.prune import DEFAULT_CHUNK_SIZE, get_retention, prune_tasks
+
+logger = logging.getLogger("prune_future_tasks")
+
+
+class Command(BaseCommand):
+    help = "Delete completed future tasks older than their retention"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--done-retention",
+            type=float,
+            default=None,
+            help="Number of days done tasks are kept (default: FUTURE_TASK_RETENTION setting or 7)",
+        )
+        parser.add_argument(
+            "--error-retention",
+            type=float,
+            default=None,
+            help="Number of days failed tasks are kept (default: FUTURE_TASK_RETENTION setting or 30)",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help=f"Maximal number of tasks deleted at once (default: {DEFAULT_CHUNK_SIZE})",
+        )
+        parser.add_argument(
+            "--archive",
+            default=None,
+            help="Path of a gzip-compressed JSON lines file the tasks are appended to before they get deleted",
+        )
+
+    def _handle_options(self, options):
+        self.retention = dict(get_retention())
+        if options["done_retention"] is not None:
+            self.retention[FutureTask.FUTURE_TASK_STATUS_DONE] = options[
+                "done_retention"
+            ]
+        if options["error_retention"] is not None:
+            self.retention[FutureTask.FUTURE_TASK_STATUS_ERROR] = options[
+                "error_retention"
+            ]
+        if any(days < 0 for days in self.retention.values()):
+            raise CommandError("The retention must not be negative")
+        self.chunk_size = options["chunk_size"]
+        if self.chunk_size < 1:
+            raise CommandError("The chunk size has to be a positive number")
+        self.archive_path = options["archive"]
+
+    def handle(self, *args, **options):
+        self._handle_options(options)
+
+        if self.archive_path is not None:
+            with gzip.open(self.archive_path, "at", encoding="utf-8") as archive:
+                number_of_tasks = prune_tasks(self.retention, self.chunk_size, archive)
+        else:
+            number_of_tasks = prune_tasks(self.retention, self.chunk_size)
+
+        logger.info(f"Pruned {number_of_tasks} tasks")
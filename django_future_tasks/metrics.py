@@ -0,0 +1,196 @@
+import bisect
+import threading
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+    30,
+    60,
+    300,
+)
+
+
+class MetricsBackend:
+    """
+    Metrics backend discarding all metrics.
+
+    Subclasses forward the metrics to a monitoring system. The `labels` are a dictionary of strings. Backends setting
+    `enabled` to `False` are not passed metrics, which are expensive to measure (e.g. the number of due tasks).
+    """
+
+    enabled = False
+
+    def increment(self, name, value=1, labels=None):
+        """Increment the counter `name` by `value`."""
+
+    def observe(self, name, value, labels=None):
+        """Add `value` to the histogram `name`."""
+
+    def set(self, name, value, labels=None):
+        """Set the gauge `name` to `value`."""
+
+
+class PrometheusMetrics(MetricsBackend):
+    """Metrics backend keeping the metrics in memory and rendering them in the Prometheus text format."""
+
+    enabled = True
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._counters = defaultdict(float)
+        self._gauges = {}
+        # Per histogram: the counts per bucket (the last one is `+Inf`), the sum and the count of all values.
+        self._histograms = {}
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted((labels or {}).items()))
+
+    def increment(self, name, value=1, labels=None):
+        with self._lock:
+            self._counters[self._key(name, labels)] += value
+
+    def observe(self, name, value, labels=None):
+        key = self._key(name, labels)
+        with self._lock:
+            if key not in self._histograms:
+                self._histograms[key] = [[0] * (len(self.buckets) + 1), 0, 0]
+            histogram = self._histograms[key]
+            histogram[0][bisect.bisect_left(self.buckets, value)] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    def set(self, name, value, labels=None):
+        with self._lock:
+            self._gauges[self._key(name, labels)] = value
+
+    @staticmethod
+    def _format_labels(labels):
+        if not labels:
+            return ""
+        return "{{{}}}".format(
+            ",".join(
+                '{}="{}"'.format(
+                    name,
+                    str(value).replace("\\", "\\\\").replace('"', '\\"'),
+                )
+                for name, value in labels
+            ),
+        )
+
+    def render(self):
+        """Return all metrics in the Prometheus text format."""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            gauges = sorted(self._gauges.items())
+            histograms = sorted(
+                (key, ([*counts], total, count))
+                for key, (counts, total, count) in self._histograms.items()
+            )
+
+        # The samples are grouped by their metric name, as each metric has to be listed in one group.
+        families = {}
+        for metric_type, metrics in (("counter", counters), ("gauge", gauges)):
+            for (name, labels), value in metrics:
+                families.setdefault(name, (metric_type, []))[1].append(
+                    f"{name}{self._format_labels(labels)} {value}",
+                )
+        for (name, labels), (counts, total, count) in histograms:
+            samples = families.setdefault(name, ("histogram", []))[1]
+            cumulative_count = 0
+            for bound, bucket_count in zip([*self.buckets, "+Inf"], counts):
+                cumulative_count += bucket_count
+                bucket_labels = self._format_labels([*labels, ("le", bound)])
+                samples.append(f"{name}_bucket{bucket_labels} {cumulative_count}")
+            samples.append(f"{name}_sum{self._format_labels(labels)} {total}")
+            samples.append(f"{name}_count{self._format_labels(labels)} {count}")
+
+        lines = []
+        for name, (metric_type, samples) in sorted(families.items()):
+            lines.append(f"# TYPE {name} {metric_type}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_metrics_backend():
+    """Return the metrics backend of this process, configured by the `FUTURE_TASK_METRICS_BACKEND` setting."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            backend_path = getattr(settings, "FUTURE_TASK_METRICS_BACKEND", None)
+            _backend = (
+                import_string(backend_path)() if backend_path else MetricsBackend()
+            )
+        return _backend
+
+
+def set_metrics_backend(backend):
+    global _backend
+    with _backend_lock:
+        _backend = backend
+
+
+def serve_metrics(port):
+    """
+    Serve the metrics of this process at `/metrics` on the given port and return the backend and the server.
+
+    If no metrics backend is configured, the metrics are kept in memory by `PrometheusMetrics`.
+    """
+    backend = get_metrics_backend()
+    if type(backend) is MetricsBackend:
+        backend = PrometheusMetrics()
+        set_metrics_backend(backend)
+    if not hasattr(backend, "render"):
+        raise ImproperlyConfigured(
+            f"The metrics backend {type(backend).__name__} cannot be served at /metrics",
+        )
+    return backend, start_metrics_server(backend, port)
+
+
+def start_metrics_server(backend, port, address=""):
+    """Serve the metrics of the backend at `/metrics` in a daemon thread and return the server."""
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+
+            body = backend.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # Scrapes are not worth a log line each.
+            pass
+
+    server = ThreadingHTTPServer((address, port), MetricsHandler)
+    threading.Thread(
+        target=server.serve_forever,
+        name="django_future_tasks-metrics",
+        daemon=True,
+    ).start()
+    return server
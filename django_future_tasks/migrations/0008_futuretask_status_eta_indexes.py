@@ -0,0 +1,27 @@
+# Generated by Django 5.1.15 on 2026-10-18 15:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("django_future_tasks", "0007_alter_periodicfuturetask_cron_string"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="futuretask",
+            index=models.Index(
+                fields=["status", "eta"],
+                name="future_task_status_eta_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="futuretask",
+            index=models.Index(
+                condition=models.Q(("status", "open")),
+                fields=["eta"],
+                name="future_task_open_eta_idx",
+            ),
+        ),
+    ]
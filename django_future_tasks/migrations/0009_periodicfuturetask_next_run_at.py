@@ -0,0 +1,30 @@
+# Generated by Django 5.1.15 on 2026-10-18 15:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("django_future_tasks", "0008_futuretask_status_eta_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="periodicfuturetask",
+            name="next_run_at",
+            field=models.DateTimeField(
+                blank=True,
+                editable=False,
+                help_text="The time of the next execution, for which no single task has been created yet.",
+                null=True,
+                verbose_name="Next run",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="periodicfuturetask",
+            index=models.Index(
+                fields=["is_active", "next_run_at"],
+                name="periodic_task_next_run_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.1.15 on 2026-10-18 16:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("django_future_tasks", "0009_periodicfuturetask_next_run_at"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="futuretask",
+            index=models.Index(
+                condition=models.Q(("status", "open")),
+                fields=["type", "eta"],
+                name="future_task_open_type_eta_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.1.15 on 2026-10-18 16:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("django_future_tasks", "0010_futuretask_type_eta_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="futuretask",
+            name="priority",
+            field=models.IntegerField(
+                default=0,
+                help_text="Tasks with a lower priority are processed first",
+                verbose_name="Priority",
+            ),
+        ),
+        migrations.AddField(
+            model_name="periodicfuturetask",
+            name="priority",
+            field=models.IntegerField(
+                default=0,
+                help_text="The priority of the single tasks",
+                verbose_name="Priority",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="futuretask",
+            index=models.Index(
+                condition=models.Q(("status", "open")),
+                fields=["priority", "eta"],
+                name="future_task_open_priority_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.15 on 2026-10-18 16:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("django_future_tasks", "0011_priority"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="futuretask",
+            name="attempts",
+            field=models.PositiveIntegerField(
+                default=0,
+                help_text="The number of failed executions",
+                verbose_name="Attempts",
+            ),
+        ),
+    ]
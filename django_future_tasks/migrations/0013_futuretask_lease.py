@@ -0,0 +1,41 @@
+# Generated by Django 5.1.15 on 2026-10-18 16:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("django_future_tasks", "0012_futuretask_attempts"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="futuretask",
+            name="lease_expires_at",
+            field=models.DateTimeField(
+                blank=True,
+                help_text="The task is reset if its worker did not renew the lease until then",
+                null=True,
+                verbose_name="Lease expires at",
+            ),
+        ),
+        migrations.AddField(
+            model_name="futuretask",
+            name="locked_by",
+            field=models.CharField(
+                blank=True,
+                help_text="The worker processing the task",
+                max_length=255,
+                null=True,
+                verbose_name="Locked by",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="futuretask",
+            index=models.Index(
+                condition=models.Q(("status", "in_progress")),
+                fields=["lease_expires_at"],
+                name="future_task_lease_idx",
+            ),
+        ),
+    ]
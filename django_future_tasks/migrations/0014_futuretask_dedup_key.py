@@ -0,0 +1,31 @@
+# Generated by Django 5.1.15 on 2026-10-18 16:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("django_future_tasks", "0013_futuretask_lease"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="futuretask",
+            name="dedup_key",
+            field=models.CharField(
+                blank=True,
+                help_text="At most one open task exists per deduplication key",
+                max_length=255,
+                null=True,
+                verbose_name="Deduplication key",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="futuretask",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("status", "open")),
+                fields=("dedup_key",),
+                name="future_task_open_dedup_key_unique",
+            ),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.1.15 on 2026-10-18 16:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("django_future_tasks", "0014_futuretask_dedup_key"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FutureTaskTokenBucket",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "type",
+                    models.CharField(
+                        max_length=255,
+                        unique=True,
+                        verbose_name="Task type",
+                    ),
+                ),
+                ("tokens", models.FloatField(verbose_name="Tokens")),
+                ("updated_at", models.DateTimeField(verbose_name="Updated at")),
+            ],
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.1.15 on 2026-10-18 16:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("django_future_tasks", "0015_futuretasktokenbucket"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="futuretask",
+            name="depends_on",
+            field=models.ManyToManyField(
+                blank=True,
+                help_text="A blocked task is opened as soon as all of these tasks are done",
+                related_name="dependents",
+                to="django_future_tasks.futuretask",
+                verbose_name="Depends on",
+            ),
+        ),
+        migrations.AddField(
+            model_name="futuretask",
+            name="has_dependents",
+            field=models.BooleanField(
+                default=False,
+                editable=False,
+                help_text="Whether other tasks depend on this task",
+                verbose_name="Has dependents",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="futuretask",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("open", "Status open"),
+                    ("in_progress", "Status in progress"),
+                    ("interrupted", "Status interrupted"),
+                    ("done", "Status done"),
+                    ("error", "Status error"),
+                    ("blocked", "Status blocked"),
+                ],
+                default="open",
+                max_length=255,
+                verbose_name="Status",
+            ),
+        ),
+    ]
@@ -1,6 +1,5 @@
 import datetime
 
-import croniter
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.db import models
@@ -9,6 +8,7 @@ from django.utils import timezone
 from django.utils.dateformat import format
 from django.utils.translation import gettext_lazy as _
 
+from .cron import next_execution
 from .fields import FutureTaskCronField
 
 
@@ -18,6 +18,7 @@ class FutureTask(models.Model):
     FUTURE_TASK_STATUS_INTERRUPTED = "interrupted"
     FUTURE_TASK_STATUS_DONE = "done"
     FUTURE_TASK_STATUS_ERROR = "error"
+    FUTURE_TASK_STATUS_BLOCKED = "blocked"
 
     FUTURE_TASK_STATUS = (
         (FUTURE_TASK_STATUS_OPEN, _("Status open")),
@@ -25,6 +26,7 @@ class FutureTask(models.Model):
         (FUTURE_TASK_STATUS_INTERRUPTED, _("Status interrupted")),
         (FUTURE_TASK_STATUS_DONE, _("Status done")),
         (FUTURE_TASK_STATUS_ERROR, _("Status error")),
+        (FUTURE_TASK_STATUS_BLOCKED, _("Status blocked")),
     )
 
     task_id = models.CharField(_("task ID"), max_length=255, unique=True)
@@ -43,6 +45,11 @@ class FutureTask(models.Model):
         blank=False,
         null=False,
     )
+    priority = models.IntegerField(
+        _("Priority"),
+        help_text=_("Tasks with a lower priority are processed first"),
+        default=0,
+    )
     status = models.CharField(
         _("Status"),
         max_length=255,
@@ -56,6 +63,47 @@ class FutureTask(models.Model):
         null=True,
     )
     execution_time = models.FloatField(blank=True, null=True, help_text="in seconds")
+    dedup_key = models.CharField(
+        _("Deduplication key"),
+        help_text=_("At most one open task exists per deduplication key"),
+        max_length=255,
+        blank=True,
+        null=True,
+    )
+    locked_by = models.CharField(
+        _("Locked by"),
+        help_text=_("The worker processing the task"),
+        max_length=255,
+        blank=True,
+        null=True,
+    )
+    lease_expires_at = models.DateTimeField(
+        _("Lease expires at"),
+        help_text=_(
+            "The task is reset if its worker did not renew the lease until then",
+        ),
+        blank=True,
+        null=True,
+    )
+    attempts = models.PositiveIntegerField(
+        _("Attempts"),
+        help_text=_("The number of failed executions"),
+        default=0,
+    )
+    depends_on = models.ManyToManyField(
+        "self",
+        verbose_name=_("Depends on"),
+        help_text=_("A blocked task is opened as soon as all of these tasks are done"),
+        symmetrical=False,
+        related_name="dependents",
+        blank=True,
+    )
+    has_dependents = models.BooleanField(
+        _("Has dependents"),
+        help_text=_("Whether other tasks depend on this task"),
+        default=False,
+        editable=False,
+    )
 
     periodic_parent_task = models.ForeignKey(
         "PeriodicFutureTask",
@@ -64,6 +112,43 @@ class FutureTask(models.Model):
         default=None,
     )
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["dedup_key"],
+                condition=Q(status="open"),
+                name="future_task_open_dedup_key_unique",
+            ),
+        ]
+        indexes = [
+            # Used to fetch the tasks due for processing.
+            models.Index(fields=["status", "eta"], name="future_task_status_eta_idx"),
+            # Smaller alternative for databases supporting partial indexes, as only the open tasks are of interest.
+            models.Index(
+                fields=["eta"],
+                condition=Q(status="open"),
+                name="future_task_open_eta_idx",
+            ),
+            # Used to fetch the tasks due for processing in the order of their priority.
+            models.Index(
+                fields=["priority", "eta"],
+                condition=Q(status="open"),
+                name="future_task_open_priority_idx",
+            ),
+            # Used to find the tasks with an expired lease.
+            models.Index(
+                fields=["lease_expires_at"],
+                condition=Q(status="in_progress"),
+                name="future_task_lease_idx",
+            ),
+            # Used by workers processing only some task types.
+            models.Index(
+                fields=["type", "eta"],
+                condition=Q(status="open"),
+                name="future_task_open_type_eta_idx",
+            ),
+        ]
+
 
 class PeriodicFutureTask(models.Model):
     periodic_task_id = models.CharField(
@@ -83,6 +168,11 @@ class PeriodicFutureTask(models.Model):
         null=True,
     )
     cron_string = FutureTaskCronField()
+    priority = models.IntegerField(
+        _("Priority"),
+        help_text=_("The priority of the single tasks"),
+        default=0,
+    )
     is_active = models.BooleanField(_("Active"), default=True)
     max_number_of_executions = models.IntegerField(
         _("Maximal number of executions"),
@@ -96,12 +186,22 @@ class PeriodicFutureTask(models.Model):
         help_text=_("The last time corresponding single tasks where created."),
         auto_now_add=True,
     )
+    next_run_at = models.DateTimeField(
+        _("Next run"),
+        help_text=_(
+            "The time of the next execution, for which no single task has been created yet.",
+        ),
+        null=True,
+        blank=True,
+        editable=False,
+    )
 
     def next_planned_execution(self):
         now = timezone.now()
-        next_planned_execution = croniter.croniter(self.cron_string, now).get_next(
-            timezone.datetime,
-        )
+        if self.next_run_at is not None and self.next_run_at > now:
+            next_planned_execution = self.next_run_at
+        else:
+            next_planned_execution = next_execution(self.cron_string, now)
         if (
             not self.is_active
             or (
@@ -109,11 +209,7 @@ class PeriodicFutureTask(models.Model):
                 and FutureTask.objects.filter(periodic_parent_task=self.pk).count()
                 >= self.max_number_of_executions
             )
-            or (
-                self.end_time is not None
-                and self.end_time
-                < croniter.croniter(self.cron_string, now).get_next(timezone.datetime)
-            )
+            or (self.end_time is not None and self.end_time < next_planned_execution)
         ):
             return None
 
@@ -134,7 +230,14 @@ class PeriodicFutureTask(models.Model):
         update_fields=None,
     ):
         if self.is_active and not self.__original_is_active:
-            self.last_task_creation = datetime.datetime.now()
+            self.last_task_creation = timezone.now()
+
+        # The creation range of the populator includes its start, so does the next run.
+        self.next_run_at = next_execution(
+            self.cron_string,
+            (self.last_task_creation or timezone.now())
+            - datetime.timedelta(microseconds=1),
+        )
 
         self.clean()
         super().save()
@@ -164,3 +267,21 @@ class PeriodicFutureTask(models.Model):
                 name="not_both_not_null",
             ),
         ]
+        indexes = [
+            # Used to fetch the periodic tasks due for processing.
+            models.Index(
+                fields=["is_active", "next_run_at"],
+                name="periodic_task_next_run_idx",
+            ),
+        ]
+
+
+class FutureTaskTokenBucket(models.Model):
+    """State of the token bucket limiting the rate of a task type, shared by all workers."""
+
+    type = models.CharField(_("Task type"), max_length=255, unique=True)
+    tokens = models.FloatField(_("Tokens"))
+    updated_at = models.DateTimeField(_("Updated at"))
+
+    def __str__(self):
+        return self.type
@@ -0,0 +1,13 @@
+import django
+from django.core.management import call_command
+
+
+def run_pool_process(options):
+    """
+    Entry point of the pool processes of `process_future_tasks`.
+
+    The pool processes are spawned, so Django has to be set up before the command (and therefore any model) can be
+    imported. That's also why this function must not live within the command module.
+    """
+    django.setup()
+    call_command("process_future_tasks", **options)
@@ -0,0 +1,59 @@
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from django_future_tasks.models import FutureTask
+
+DEFAULT_RETENTION = {
+    FutureTask.FUTURE_TASK_STATUS_DONE: 7,
+    FutureTask.FUTURE_TASK_STATUS_ERROR: 30,
+}
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def get_retention():
+    """Return the number of days completed tasks are kept, per status (`FUTURE_TASK_RETENTION` setting)."""
+    return getattr(settings, "FUTURE_TASK_RETENTION", DEFAULT_RETENTION)
+
+
+def prunable_tasks(status, days):
+    """
+    Return the tasks of the given status with an ETA more than `days` days ago.
+
+    Single tasks of periodic tasks with a maximal number of executions are kept, as they are counted to stop
+    creating further single tasks.
+    """
+    return FutureTask.objects.filter(
+        status=status,
+        eta__lt=timezone.now() - timedelta(days=days),
+    ).exclude(periodic_parent_task__max_number_of_executions__isnull=False)
+
+
+def prune_tasks(retention, chunk_size=DEFAULT_CHUNK_SIZE, archive=None):
+    """
+    Delete the completed tasks older than their retention and return their number.
+
+    `retention` maps the statuses to the number of days tasks of that status are kept. Tasks are deleted in chunks of
+    `chunk_size` tasks, so no lock is held for long. If `archive` is given, the tasks are written to it as JSON lines
+    before they get deleted.
+    """
+    number_of_tasks = 0
+    for status, days in retention.items():
+        queryset = prunable_tasks(status, days).order_by("pk")
+        while True:
+            if archive is not None:
+                tasks = list(queryset.values()[:chunk_size])
+                task_pks = [task["id"] for task in tasks]
+                for task in tasks:
+                    archive.write(json.dumps(task, cls=DjangoJSONEncoder) + "\n")
+            else:
+                task_pks = list(queryset.values_list("pk", flat=True)[:chunk_size])
+
+            FutureTask.objects.filter(pk__in=task_pks).delete()
+            number_of_tasks += len(task_pks)
+            if len(task_pks) < chunk_size:
+                break
+    return number_of_tasks
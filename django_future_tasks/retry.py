@@ -0,0 +1,84 @@
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from django_future_tasks.models import FutureTask
+
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_BACKOFF_BASE = 1
+DEFAULT_BACKOFF_CAP = 3600
+
+
+class RetryPolicy:
+    """
+    Retry policy of a task type.
+
+    A failed task is retried until it failed `max_attempts` times. The delay before the n-th retry is
+    `backoff_base * 2 ** (n - 1)` seconds, but at most `backoff_cap` seconds. With `jitter`, a random delay of up to
+    half of that is subtracted, so the retries of tasks failing at the same time spread out.
+    """
+
+    def __init__(
+        self,
+        max_attempts=DEFAULT_MAX_ATTEMPTS,
+        backoff_base=DEFAULT_BACKOFF_BASE,
+        backoff_cap=DEFAULT_BACKOFF_CAP,
+        jitter=True,
+    ):
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.jitter = jitter
+
+    def delay(self, attempts):
+        """Return the number of seconds to wait after the given number of failed attempts."""
+        delay = min(self.backoff_cap, self.backoff_base * 2 ** (attempts - 1))
+        if self.jitter:
+            delay -= random.uniform(0, delay / 2)
+        return delay
+
+    def should_retry(self, attempts):
+        return attempts < self.max_attempts
+
+
+def get_retry_policy(task_type):
+    """Return the retry policy configured for `task_type` in `FUTURE_TASK_RETRY_POLICIES` or `None`."""
+    options = getattr(settings, "FUTURE_TASK_RETRY_POLICIES", {}).get(task_type)
+    if options is None:
+        return None
+    return RetryPolicy(**options)
+
+
+def _is_superseded(task):
+    # Open tasks are unique per deduplication key, so a task is not retried if an open task with the same key has been
+    # scheduled meanwhile, which does its work.
+    return (
+        task.dedup_key is not None
+        and FutureTask.objects.filter(
+            status=FutureTask.FUTURE_TASK_STATUS_OPEN,
+            dedup_key=task.dedup_key,
+        ).exists()
+    )
+
+
+def handle_failure(task):
+    """
+    Count the failed attempt of the task and reschedule it according to its retry policy.
+
+    Returns `True` if the task is retried, otherwise it is marked as failed.
+    """
+    task.attempts += 1
+    policy = get_retry_policy(task.type)
+    if (
+        policy is not None
+        and policy.should_retry(task.attempts)
+        and not _is_superseded(task)
+    ):
+        task.status = FutureTask.FUTURE_TASK_STATUS_OPEN
+        task.eta = timezone.now() + timedelta(seconds=policy.delay(task.attempts))
+        return True
+
+    task.status = FutureTask.FUTURE_TASK_STATUS_ERROR
+    return False
@@ -0,0 +1,57 @@
+import heapq
+from datetime import timedelta
+
+from django_future_tasks.models import FutureTask
+
+DEFAULT_HORIZON = 60
+DEFAULT_SIZE = 100
+
+
+class EtaSchedule:
+    """
+    In-memory min-heap of the upcoming `(eta, pk)` pairs of open tasks.
+
+    The heap is loaded by a bounded query for the tasks due within the next `horizon` seconds. It is considered to be
+    complete until the horizon passed (or, if the query hit its limit, until the last loaded task is due) or until it
+    gets invalidated, e.g. because new tasks arrived. Only the tasks of `queryset` (default: all tasks) are considered.
+    """
+
+    def __init__(self, horizon=DEFAULT_HORIZON, size=DEFAULT_SIZE, queryset=None):
+        self.horizon = timedelta(seconds=horizon)
+        self.size = size
+        self.queryset = queryset if queryset is not None else FutureTask.objects.all()
+        self._heap = []
+        self._valid_until = None
+
+    def invalidate(self):
+        self._valid_until = None
+
+    def refresh(self, now):
+        # Tasks due already are claimed by the worker, so only upcoming ones are loaded. The query result is sorted by
+        # the ETA and is therefore a valid heap already.
+        self._heap = list(
+            self.queryset.filter(
+                status=FutureTask.FUTURE_TASK_STATUS_OPEN,
+                eta__gt=now,
+                eta__lte=now + self.horizon,
+            )
+            .order_by("eta", "pk")
+            .values_list("eta", "pk")[: self.size],
+        )
+        if len(self._heap) == self.size:
+            self._valid_until = self._heap[-1][0]
+        else:
+            self._valid_until = now + self.horizon
+
+    def seconds_until_next(self, now):
+        """
+        Return the number of seconds until the next known task is due or the schedule has to be refreshed.
+        """
+        if self._valid_until is None or self._valid_until <= now:
+            self.refresh(now)
+
+        while self._heap and self._heap[0][0] <= now:
+            heapq.heappop(self._heap)
+
+        next_time = self._heap[0][0] if self._heap else self._valid_until
+        return (next_time - now).total_seconds()
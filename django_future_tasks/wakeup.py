@@ -0,0 +1,163 @@
+import select
+import threading
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from django_future_tasks.models import FutureTask
+
+NOTIFY_CHANNEL = "django_future_tasks"
+
+# Lower bound for any waiting time, so a worker never busy-waits for a task that is due in a few microseconds.
+MIN_POLL_INTERVAL = 0.05
+
+
+class PollingWakeup:
+    """
+    Wakeup backend for databases without a notification mechanism.
+
+    Workers poll the database with an adaptive interval of at most `max_poll_interval` seconds, but get woken up
+    immediately if a task is saved within the same process.
+    """
+
+    max_poll_interval = 1
+
+    def __init__(self, using=DEFAULT_DB_ALIAS):
+        self.using = using
+        self.generation = 0
+        self._condition = threading.Condition()
+
+    def wake_up(self):
+        """Wake up all workers of this process waiting for tasks."""
+        with self._condition:
+            self.generation += 1
+            self._condition.notify_all()
+
+    def notify(self):
+        """Wake up all workers waiting for tasks."""
+        self.wake_up()
+
+    def wait(self, timeout, generation):
+        """
+        Wait until `timeout` seconds passed or the workers got woken up since `generation`.
+
+        Returns `True` if the workers got woken up.
+        """
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: self.generation != generation,
+                timeout,
+            )
+
+
+class PostgresWakeup(PollingWakeup):
+    """
+    Wakeup backend using PostgreSQL's `LISTEN`/`NOTIFY`.
+
+    Each worker thread listens on its own database connection, so workers of all processes and hosts get woken up
+    as soon as a task is saved. Polling is only used as a safety net.
+    """
+
+    max_poll_interval = 10
+
+    # Maximal time to block on the database connection, so local wakeups (e.g. on termination) are noticed in time.
+    _max_select_interval = 1
+
+    def __init__(self, using=DEFAULT_DB_ALIAS):
+        super().__init__(using)
+        self._local = threading.local()
+
+    def notify(self):
+        super().notify()
+        with connections[self.using].cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, '')", [NOTIFY_CHANNEL])
+
+    def _listen(self):
+        connection = connections[self.using]
+        connection.ensure_connection()
+        raw_connection = connection.connection
+        if getattr(self._local, "connection", None) is not raw_connection:
+            with connection.cursor() as cursor:
+                cursor.execute(f"LISTEN {NOTIFY_CHANNEL}")
+            self._local.notified = False
+            if _is_psycopg3():
+                # The connection is used for the queries of the worker as well. psycopg drops the notifications
+                # received during these queries, unless a handler is registered.
+                raw_connection.add_notify_handler(self._handle_notify)
+            self._local.connection = raw_connection
+        return raw_connection
+
+    def _handle_notify(self, notify):
+        # Called by the thread running a query on its connection, so the flag is thread-local as well.
+        self._local.notified = True
+
+    @staticmethod
+    def _readable(raw_connection, timeout):
+        return bool(select.select([raw_connection], [], [], timeout)[0])
+
+    def _receive(self, raw_connection, timeout):
+        if _is_psycopg3():
+            if not self._local.notified and not self._readable(raw_connection, timeout):
+                return False
+            notified = bool(list(raw_connection.notifies(timeout=0)))
+            notified = notified or self._local.notified
+            self._local.notified = False
+            return notified
+
+        # psycopg2 collects the notifications received during other queries in `notifies`, after which the socket is
+        # not readable anymore.
+        if not raw_connection.notifies and not self._readable(raw_connection, timeout):
+            return False
+        raw_connection.poll()
+        notified = bool(raw_connection.notifies)
+        raw_connection.notifies.clear()
+        return notified
+
+    def wait(self, timeout, generation):
+        raw_connection = self._listen()
+        while timeout > 0 and self.generation == generation:
+            interval = min(timeout, self._max_select_interval)
+            if self._receive(raw_connection, interval):
+                return True
+            timeout -= interval
+        return self.generation != generation
+
+
+def _is_psycopg3():
+    from django.db.backends.postgresql.psycopg_any import is_psycopg3
+
+    return is_psycopg3
+
+
+def _supports_listen(connection):
+    if connection.vendor != "postgresql":
+        return False
+    if not _is_psycopg3():
+        return True
+
+    import psycopg
+
+    # Waiting for notifications with a timeout requires psycopg 3.2.
+    return tuple(int(part) for part in psycopg.__version__.split(".")[:2]) >= (3, 2)
+
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_wakeup_backend(using=DEFAULT_DB_ALIAS):
+    """Return the wakeup backend of this process for the given database."""
+    with _backends_lock:
+        if using not in _backends:
+            if _supports_listen(connections[using]):
+                _backends[using] = PostgresWakeup(using)
+            else:
+                _backends[using] = PollingWakeup(using)
+        return _backends[using]
+
+
+@receiver(post_save, sender=FutureTask)
+def notify_workers(sender, instance, using, **kwargs):
+    if instance.status == FutureTask.FUTURE_TASK_STATUS_OPEN:
+        transaction.on_commit(get_wakeup_backend(using).notify, using=using)
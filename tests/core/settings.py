@@ -65,9 +65,25 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": os.path.join(BASE_DIR, "db.sqlite3"),
+        # Several workers (threads) write to the database concurrently within the tests, which fails for the shared
+        # in-memory database ("database table is locked"), so a database file is used instead.
+        "TEST": {
+            "NAME": os.path.join(BASE_DIR, "test_db.sqlite3"),
+        },
     },
 }
 
+# PostgreSQL is used if configured by environment variables (e.g. for benchmarks).
+if os.environ.get("POSTGRES_DB"):
+    DATABASES["default"] = {
+        "ENGINE": "django.db.backends.postgresql",
+        "NAME": os.environ["POSTGRES_DB"],
+        "USER": os.environ.get("POSTGRES_USER", "postgres"),
+        "PASSWORD": os.environ.get("POSTGRES_PASSWORD", ""),
+        "HOST": os.environ.get("POSTGRES_HOST", "localhost"),
+        "PORT": os.environ.get("POSTGRES_PORT", "5432"),
+    }
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
@@ -104,6 +120,11 @@ FUTURE_TASK_TYPE_TWO = "task_two"
 FUTURE_TASK_TYPE_ERROR = "task_error"
 FUTURE_TASK_TYPE_INTERRUPTION = "task_interruption"
 FUTURE_TASK_TYPE_ETA_ORDERING = "task_eta_ordering"
+FUTURE_TASK_TYPE_ASYNC = "task_async"
+FUTURE_TASK_TYPE_REGISTRY = "task_registry"
+FUTURE_TASK_TYPE_UNKNOWN = "task_unknown"
+FUTURE_TASK_TYPE_BENCHMARK_NOOP = "benchmark_noop"
+FUTURE_TASK_TYPE_BENCHMARK_SLEEP = "benchmark_sleep"
 
 FUTURE_TASK_TYPES = (
     (FUTURE_TASK_TYPE_ONE, "Task 1"),
@@ -111,6 +132,11 @@ FUTURE_TASK_TYPES = (
     (FUTURE_TASK_TYPE_ERROR, "Task Error"),
     (FUTURE_TASK_TYPE_INTERRUPTION, "Task Interruption"),
     (FUTURE_TASK_TYPE_ETA_ORDERING, "Task ETA Ordering"),
+    (FUTURE_TASK_TYPE_ASYNC, "Task Async"),
+    (FUTURE_TASK_TYPE_REGISTRY, "Task Registry"),
+    (FUTURE_TASK_TYPE_UNKNOWN, "Task Unknown"),
+    (FUTURE_TASK_TYPE_BENCHMARK_NOOP, "Benchmark No-op"),
+    (FUTURE_TASK_TYPE_BENCHMARK_SLEEP, "Benchmark Sleep"),
 )
 
 STATIC_URL = "/static/"
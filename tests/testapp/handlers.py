@@ -1,10 +1,11 @@
+import asyncio
 import time
 from sys import intern
 from time import monotonic_ns
 
 from django.dispatch import receiver
 
-from django_future_tasks.handlers import future_task_signal
+from django_future_tasks.handlers import future_task_handler, future_task_signal
 from tests.core import settings
 
 
@@ -32,3 +33,25 @@ def my_task_function_interruption(sender, instance, **kwargs):
 def my_task_function_eta_ordering(sender, instance, **kwargs):
     instance.result = monotonic_ns()
     instance.save()
+
+
+@receiver(future_task_signal, sender=intern(settings.FUTURE_TASK_TYPE_ASYNC))
+async def my_task_function_async(sender, instance, **kwargs):
+    await asyncio.sleep(0.5)
+    instance.result = instance.data
+
+
+@future_task_handler(settings.FUTURE_TASK_TYPE_REGISTRY)
+def my_task_handler(task):
+    task.result = task.data
+
+
+@future_task_handler(settings.FUTURE_TASK_TYPE_BENCHMARK_NOOP)
+def benchmark_noop(task):
+    task.result = time.time()
+
+
+@future_task_handler(settings.FUTURE_TASK_TYPE_BENCHMARK_SLEEP)
+def benchmark_sleep(task):
+    task.result = time.time()
+    time.sleep(task.data["sleep"])
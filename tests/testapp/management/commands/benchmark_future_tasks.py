@@ -0,0 +1,173 @@
+import json
+import math
+import timeit
+from datetime import timedelta
+
+import django
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from django_future_tasks.management.commands.populate_periodic_future_tasks import (
+    Command as PopulatePeriodicTasksCommand,
+)
+from django_future_tasks.models import FutureTask, PeriodicFutureTask
+from tests.core import settings
+
+BENCHMARK_TYPES = [
+    settings.FUTURE_TASK_TYPE_BENCHMARK_NOOP,
+    settings.FUTURE_TASK_TYPE_BENCHMARK_SLEEP,
+]
+
+
+def _percentile(values, percent):
+    """Return the percentile of the values using the nearest-rank method."""
+    if not values:
+        return None
+    values = sorted(values)
+    return values[max(math.ceil(percent / 100 * len(values)) - 1, 0)]
+
+
+class Command(BaseCommand):
+    help = "Measure the throughput and latency of the future task processing and population"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--tasks",
+            type=int,
+            default=1000,
+            help="Number of future tasks to process (default: 1000)",
+        )
+        parser.add_argument(
+            "--periodic-tasks",
+            type=int,
+            default=100,
+            help="Number of periodic future tasks to populate (default: 100)",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0,
+            help="Number of milliseconds each task sleeps (default: 0, i.e. no-op tasks)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=None,
+            help="Batch size of process_future_tasks",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=1,
+            help="Concurrency of process_future_tasks, queries are only counted for a concurrency of 1",
+        )
+        parser.add_argument(
+            "--flush-size",
+            type=int,
+            default=1,
+            help="Flush size of process_future_tasks",
+        )
+
+    @staticmethod
+    def _clean_up():
+        FutureTask.objects.filter(type__in=BENCHMARK_TYPES).delete()
+        PeriodicFutureTask.objects.filter(type__in=BENCHMARK_TYPES).delete()
+
+    def benchmark_process(self, options):
+        number_of_tasks = options["tasks"]
+        if options["sleep"]:
+            task_type = settings.FUTURE_TASK_TYPE_BENCHMARK_SLEEP
+        else:
+            task_type = settings.FUTURE_TASK_TYPE_BENCHMARK_NOOP
+        eta = timezone.now()
+        FutureTask.objects.bulk_create(
+            FutureTask(
+                task_id=f"benchmark_{i}",
+                eta=eta,
+                type=task_type,
+                data={"sleep": options["sleep"] / 1000},
+            )
+            for i in range(number_of_tasks)
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            start_time = timeit.default_timer()
+            call_command(
+                "process_future_tasks",
+                onetimerun=True,
+                batch_size=options["batch_size"],
+                concurrency=options["concurrency"],
+                flush_size=options["flush_size"],
+            )
+            duration = timeit.default_timer() - start_time
+
+        # The handlers store the time they got started as result.
+        latencies = [
+            started_at - eta.timestamp()
+            for started_at in FutureTask.objects.filter(type=task_type).values_list(
+                "result",
+                flat=True,
+            )
+        ]
+        return {
+            "tasks": number_of_tasks,
+            "duration": duration,
+            "throughput": number_of_tasks / duration,
+            "latency_p50": _percentile(latencies, 50),
+            "latency_p99": _percentile(latencies, 99),
+            "queries_per_task": (
+                len(queries) / number_of_tasks if options["concurrency"] == 1 else None
+            ),
+        }
+
+    def benchmark_populate(self, options):
+        number_of_periodic_tasks = options["periodic_tasks"]
+        PeriodicFutureTask.objects.bulk_create(
+            PeriodicFutureTask(
+                periodic_task_id=f"benchmark_{i}",
+                type=settings.FUTURE_TASK_TYPE_BENCHMARK_NOOP,
+                cron_string="* * * * *",
+            )
+            for i in range(number_of_periodic_tasks)
+        )
+        # Each periodic task has to catch up on the executions of the last hour.
+        PeriodicFutureTask.objects.filter(
+            type=settings.FUTURE_TASK_TYPE_BENCHMARK_NOOP,
+        ).update(last_task_creation=timezone.now() - timedelta(hours=1))
+
+        command = PopulatePeriodicTasksCommand()
+        command._handle_options({"shard": None, "metrics_port": None})
+        command.tick = 0
+        with CaptureQueriesContext(connection) as queries:
+            start_time = timeit.default_timer()
+            command.handle_tick()
+            duration = timeit.default_timer() - start_time
+
+        number_of_tasks = FutureTask.objects.filter(
+            periodic_parent_task__type=settings.FUTURE_TASK_TYPE_BENCHMARK_NOOP,
+        ).count()
+        return {
+            "periodic_tasks": number_of_periodic_tasks,
+            "created_tasks": number_of_tasks,
+            "duration": duration,
+            "throughput": number_of_tasks / duration,
+            "queries": len(queries),
+        }
+
+    def handle(self, *args, **options):
+        self._clean_up()
+        try:
+            result = {
+                "database": connection.vendor,
+                "django": django.get_version(),
+                "process": self.benchmark_process(options),
+            }
+            self._clean_up()
+            result["populate"] = self.benchmark_populate(options)
+        finally:
+            self._clean_up()
+
+        self.stdout.write(json.dumps(result, indent=2))
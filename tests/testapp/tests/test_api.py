@@ -0,0 +1,58 @@
+from datetime import timedelta
+
+import time_machine
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+from django.utils import timezone
+
+from django_future_tasks import schedule_many
+from django_future_tasks.models import FutureTask
+from tests.core import settings
+
+
+class TestScheduleMany(TestCase):
+    @time_machine.travel("2024-01-01 00:00 +0000", tick=False)
+    def test_schedule_many(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            tasks = schedule_many(
+                [
+                    {"type": settings.FUTURE_TASK_TYPE_ONE, "data": {"number": i}}
+                    for i in range(5)
+                ]
+                + [
+                    FutureTask(
+                        task_id="task",
+                        eta=timezone.now() + timedelta(hours=1),
+                        type=settings.FUTURE_TASK_TYPE_TWO,
+                    ),
+                ],
+                chunk_size=2,
+            )
+        # The workers are woken up once for all tasks.
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(len({task.task_id for task in tasks}), 6)
+        self.assertEqual(FutureTask.objects.count(), 6)
+        self.assertEqual(
+            FutureTask.objects.filter(eta=timezone.now()).count(),
+            5,
+        )
+        self.assertEqual(
+            FutureTask.objects.get(task_id="task").type,
+            settings.FUTURE_TASK_TYPE_TWO,
+        )
+
+    def test_schedule_many_idempotent(self):
+        spec = {"task_id": "task", "type": settings.FUTURE_TASK_TYPE_ONE}
+        schedule_many([spec])
+        schedule_many([spec, {"type": settings.FUTURE_TASK_TYPE_ONE}])
+        self.assertEqual(FutureTask.objects.count(), 2)
+
+    def test_schedule_many_unknown_type(self):
+        with self.assertRaises(ValidationError):
+            schedule_many(
+                [
+                    {"type": settings.FUTURE_TASK_TYPE_ONE},
+                    {"type": "unknown"},
+                ],
+            )
+        self.assertFalse(FutureTask.objects.exists())
@@ -0,0 +1,92 @@
+import threading
+import time
+from timeit import default_timer
+
+from django.core.management import CommandError, call_command
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+
+from django_future_tasks.management.commands.process_future_tasks import (
+    Command as ProcessTasksCommand,
+)
+from django_future_tasks.models import FutureTask
+from tests.core import settings
+
+
+class TestFutureTasksAsync(TransactionTestCase):
+    def test_process_future_tasks_async(self):
+        for i in range(4):
+            FutureTask.objects.create(
+                task_id=f"task_{i}",
+                eta=timezone.now(),
+                type=settings.FUTURE_TASK_TYPE_ASYNC,
+                data={"number": i},
+            )
+        FutureTask.objects.create(
+            task_id="task_error",
+            eta=timezone.now(),
+            type=settings.FUTURE_TASK_TYPE_ERROR,
+        )
+        start_time = default_timer()
+        call_command(
+            "process_future_tasks",
+            onetimerun=True,
+            async_mode=True,
+            max_inflight=4,
+        )
+        # The async receivers sleep concurrently.
+        self.assertLess(default_timer() - start_time, 4 * 0.5)
+        for task in FutureTask.objects.filter(type=settings.FUTURE_TASK_TYPE_ASYNC):
+            self.assertEqual(task.status, FutureTask.FUTURE_TASK_STATUS_DONE)
+            self.assertEqual(task.result, task.data)
+        task_error = FutureTask.objects.get(task_id="task_error")
+        self.assertEqual(task_error.status, FutureTask.FUTURE_TASK_STATUS_ERROR)
+        self.assertEqual(task_error.result["args"], ["task error"])
+
+    @override_settings(
+        FUTURE_TASK_RETRY_POLICIES={
+            settings.FUTURE_TASK_TYPE_ERROR: {"max_attempts": 2, "jitter": False},
+        },
+    )
+    def test_process_future_tasks_async_retry_dedup_key(self):
+        task = FutureTask.objects.create(
+            task_id="task",
+            eta=timezone.now(),
+            type=settings.FUTURE_TASK_TYPE_ERROR,
+            dedup_key="key",
+        )
+        call_command("process_future_tasks", onetimerun=True, async_mode=True)
+        task.refresh_from_db()
+        self.assertEqual(task.status, FutureTask.FUTURE_TASK_STATUS_OPEN)
+        self.assertEqual(task.attempts, 1)
+        self.assertEqual(task.result["args"], ["task error"])
+
+    def test_termination_cancels_in_flight_tasks(self):
+        task = FutureTask.objects.create(
+            task_id="task",
+            eta=timezone.now(),
+            type=settings.FUTURE_TASK_TYPE_ASYNC,
+        )
+        command = ProcessTasksCommand()
+
+        def terminate():
+            # Terminate once the task is in flight, like a SIGTERM received while the task is running.
+            while command._loop is None:
+                time.sleep(0.01)
+            time.sleep(0.2)
+            command._handle_termination()
+
+        terminator = threading.Thread(target=terminate)
+        terminator.start()
+        call_command(command, async_mode=True, max_inflight=1)
+        terminator.join()
+        task.refresh_from_db()
+        self.assertEqual(task.status, FutureTask.FUTURE_TASK_STATUS_INTERRUPTED)
+
+    def test_async_thread_pool(self):
+        with self.assertRaises(CommandError):
+            call_command(
+                "process_future_tasks",
+                async_mode=True,
+                concurrency=2,
+            )
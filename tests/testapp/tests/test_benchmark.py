@@ -0,0 +1,30 @@
+import json
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TransactionTestCase
+
+from django_future_tasks.models import FutureTask, PeriodicFutureTask
+
+
+class TestBenchmark(TransactionTestCase):
+    def test_benchmark_future_tasks(self):
+        stdout = StringIO()
+        call_command(
+            "benchmark_future_tasks",
+            tasks=20,
+            periodic_tasks=2,
+            stdout=stdout,
+        )
+        result = json.loads(stdout.getvalue())
+        self.assertEqual(result["process"]["tasks"], 20)
+        self.assertGreater(result["process"]["throughput"], 0)
+        self.assertLessEqual(
+            result["process"]["latency_p50"],
+            result["process"]["latency_p99"],
+        )
+        self.assertGreater(result["process"]["queries_per_task"], 0)
+        # Each periodic task catches up on the executions of the last hour.
+        self.assertGreaterEqual(result["populate"]["created_tasks"], 2 * 60)
+        self.assertFalse(FutureTask.objects.exists())
+        self.assertFalse(PeriodicFutureTask.objects.exists())
@@ -0,0 +1,197 @@
+from datetime import timedelta
+from unittest import mock
+
+import time_machine
+from django import db
+from django.core.management import call_command
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from django_future_tasks.management.commands.process_future_tasks import (
+    Command as ProcessTasksCommand,
+)
+from django_future_tasks.models import FutureTask
+from tests.core import settings
+
+
+class TestFutureTasksClaim(TestCase):
+    @time_machine.travel("2024-01-01 00:00 +0000", tick=False)
+    def test_claim_tasks(self):
+        _now = timezone.now()
+        task_due = FutureTask.objects.create(
+            task_id="task_due",
+            eta=_now,
+            type=settings.FUTURE_TASK_TYPE_ONE,
+        )
+        task_future = FutureTask.objects.create(
+            task_id="task_future",
+            eta=_now + timedelta(microseconds=1),
+            type=settings.FUTURE_TASK_TYPE_ONE,
+        )
+        self.assertEqual(ProcessTasksCommand().claim_tasks(), [task_due])
+        task_due.refresh_from_db()
+        task_future.refresh_from_db()
+        self.assertEqual(task_due.status, FutureTask.FUTURE_TASK_STATUS_IN_PROGRESS)
+        self.assertEqual(task_future.status, FutureTask.FUTURE_TASK_STATUS_OPEN)
+
+    @time_machine.travel("2024-01-01 00:00 +0000", tick=False)
+    def test_claim_tasks_multiple_workers(self):
+        _now = timezone.now()
+        for i in range(3):
+            FutureTask.objects.create(
+                task_id=f"task_{i}",
+                eta=_now,
+                type=settings.FUTURE_TASK_TYPE_ONE,
+            )
+        self.assertEqual(len(ProcessTasksCommand().claim_tasks()), 3)
+        self.assertEqual(ProcessTasksCommand().claim_tasks(), [])
+
+    @time_machine.travel("2024-01-01 00:00 +0000", tick=False)
+    def test_claim_tasks_skip_locked(self):
+        _now = timezone.now()
+        for i in range(3):
+            FutureTask.objects.create(
+                task_id=f"task_{i}",
+                eta=_now,
+                type=settings.FUTURE_TASK_TYPE_ONE,
+            )
+        command = ProcessTasksCommand()
+        # SQLite ignores `FOR UPDATE`, so the claim of databases supporting it can be run here as well.
+        with mock.patch.object(
+            db.connection.features,
+            "has_select_for_update_skip_locked",
+            True,
+        ), CaptureQueriesContext(db.connection) as queries:
+            self.assertEqual(len(command.claim_tasks()), 3)
+        # All tasks are claimed with a single `UPDATE`.
+        self.assertEqual(
+            len([query for query in queries if query["sql"].startswith("UPDATE")]),
+            1,
+        )
+        self.assertFalse(
+            FutureTask.objects.exclude(
+                status=FutureTask.FUTURE_TASK_STATUS_IN_PROGRESS,
+                locked_by=command.worker_id,
+            ).exists(),
+        )
+
+    @time_machine.travel("2024-01-01 00:00 +0000", tick=False)
+    def test_claim_tasks_batch_size(self):
+        _now = timezone.now()
+        for i in range(3):
+            FutureTask.objects.create(
+                task_id=f"task_{i}",
+                eta=_now - timedelta(seconds=i),
+                type=settings.FUTURE_TASK_TYPE_ONE,
+            )
+        command = ProcessTasksCommand()
+        command.batch_size = 2
+        self.assertEqual(
+            [task.task_id for task in command.claim_tasks()],
+            ["task_2", "task_1"],
+        )
+        self.assertEqual(
+            [task.task_id for task in command.claim_tasks()],
+            ["task_0"],
+        )
+
+    @time_machine.travel("2024-01-01 00:00 +0000", tick=False)
+    def test_claim_tasks_priority(self):
+        _now = timezone.now()
+        for i, priority in enumerate([1, 0, 1]):
+            FutureTask.objects.create(
+                task_id=f"task_{i}",
+                eta=_now - timedelta(seconds=i),
+                type=settings.FUTURE_TASK_TYPE_ONE,
+                priority=priority,
+            )
+        self.assertEqual(
+            [task.task_id for task in ProcessTasksCommand().claim_tasks()],
+            ["task_1", "task_2", "task_0"],
+        )
+
+    @time_machine.travel("2024-01-01 00:00 +0000", tick=False)
+    def test_claim_tasks_priority_aging(self):
+        _now = timezone.now()
+        FutureTask.objects.create(
+            task_id="task_urgent",
+            eta=_now,
+            type=settings.FUTURE_TASK_TYPE_ONE,
+            priority=0,
+        )
+        FutureTask.objects.create(
+            task_id="task_aged",
+            eta=_now - timedelta(seconds=60),
+            type=settings.FUTURE_TASK_TYPE_ONE,
+            priority=10,
+        )
+        command = ProcessTasksCommand()
+        command.batch_size = 1
+        command.priority_aging = 30
+        self.assertEqual(
+            [task.task_id for task in command.claim_tasks()],
+            ["task_aged"],
+        )
+
+    @time_machine.travel("2024-01-01 00:00 +0000", tick=False)
+    def test_claim_tasks_priority_aging_processing_order(self):
+        _now = timezone.now()
+        FutureTask.objects.create(
+            task_id="task_urgent",
+            eta=_now,
+            type=settings.FUTURE_TASK_TYPE_ONE,
+            priority=0,
+        )
+        FutureTask.objects.create(
+            task_id="task_aged",
+            eta=_now - timedelta(seconds=60),
+            type=settings.FUTURE_TASK_TYPE_ONE,
+            priority=10,
+        )
+        command = ProcessTasksCommand()
+        command.priority_aging = 30
+        # Both tasks are claimed at once, but the overdue one is still processed first.
+        self.assertEqual(
+            [task.task_id for task in command.claim_tasks()],
+            ["task_aged", "task_urgent"],
+        )
+
+    def test_claim_tasks_priority_aging_mixed_priorities(self):
+        _now = timezone.now()
+        for task_id, overdue, priority in (
+            ("task_urgent", 0, 0),
+            ("task_aged_low", 120, 10),
+            ("task_aged_high", 60, 1),
+            ("task_aged_medium", 90, 5),
+        ):
+            FutureTask.objects.create(
+                task_id=task_id,
+                eta=_now - timedelta(seconds=overdue),
+                type=settings.FUTURE_TASK_TYPE_ONE,
+                priority=priority,
+            )
+        command = ProcessTasksCommand()
+        command.batch_size = 1
+        command.priority_aging = 30
+        # The aged tasks are claimed first, but still in the order of their priority.
+        self.assertEqual(
+            [command.claim_tasks()[0].task_id for _ in range(4)],
+            ["task_aged_high", "task_aged_medium", "task_aged_low", "task_urgent"],
+        )
+
+    @time_machine.travel("2024-01-01 00:00 +0000", tick=False)
+    def test_process_future_tasks_onetimerun_batch_size(self):
+        _now = timezone.now()
+        for i in range(3):
+            FutureTask.objects.create(
+                task_id=f"task_{i}",
+                eta=_now,
+                type=settings.FUTURE_TASK_TYPE_ONE,
+            )
+        call_command("process_future_tasks", onetimerun=True, batch_size=2)
+        self.assertFalse(
+            FutureTask.objects.exclude(
+                status=FutureTask.FUTURE_TASK_STATUS_DONE,
+            ).exists(),
+        )
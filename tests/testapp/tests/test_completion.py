@@ -0,0 +1,157 @@
+from contextlib import contextmanager
+from unittest import mock
+
+import time_machine
+from django import db
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.db.models import QuerySet
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from django_future_tasks.completion import CompletionBuffer
+from django_future_tasks.models import FutureTask
+from tests.core import settings
+
+
+class TestCompletionBuffer(TestCase):
+    def _create_tasks(self, number_of_tasks):
+        for i in range(number_of_tasks):
+            FutureTask.objects.create(
+                task_id=f"task_{i}",
+                eta=timezone.now(),
+                type=settings.FUTURE_TASK_TYPE_ONE,
+                status=FutureTask.FUTURE_TASK_STATUS_IN_PROGRESS,
+            )
+        return list(FutureTask.objects.defer("result"))
+
+    def _number_of_done_tasks(self):
+        return FutureTask.objects.filter(
+            status=FutureTask.FUTURE_TASK_STATUS_DONE,
+        ).count()
+
+    @contextmanager
+    def assertNumUpdates(self, number):
+        # The savepoints of the flush are not counted.
+        with CaptureQueriesContext(db.connection) as context:
+            yield
+        self.assertEqual(
+            len(
+                [
+                    query
+                    for query in context.captured_queries
+                    if query["sql"].startswith("UPDATE")
+                ],
+            ),
+            number,
+        )
+
+    def test_flush_size(self):
+        tasks = self._create_tasks(3)
+        buffer = CompletionBuffer(size=2, interval=60)
+        for task in tasks:
+            task.status = FutureTask.FUTURE_TASK_STATUS_DONE
+            task.execution_time = 0.1
+        buffer.add(tasks[0])
+        self.assertEqual(self._number_of_done_tasks(), 0)
+        with self.assertNumUpdates(1):
+            buffer.add(tasks[1])
+        self.assertEqual(self._number_of_done_tasks(), 2)
+        buffer.add(tasks[2])
+        buffer.flush()
+        self.assertEqual(self._number_of_done_tasks(), 3)
+
+    def test_flush_interval(self):
+        tasks = self._create_tasks(1)
+        buffer = CompletionBuffer(size=10, interval=0)
+        tasks[0].status = FutureTask.FUTURE_TASK_STATUS_DONE
+        buffer.add(tasks[0])
+        self.assertEqual(self._number_of_done_tasks(), 1)
+
+    def test_flush_result(self):
+        tasks = self._create_tasks(2)
+        buffer = CompletionBuffer(size=10, interval=60)
+        tasks[0].status = FutureTask.FUTURE_TASK_STATUS_DONE
+        tasks[1].status = FutureTask.FUTURE_TASK_STATUS_ERROR
+        tasks[1].result = {"args": ["task error"]}
+        buffer.add(tasks[0])
+        buffer.add(tasks[1])
+        # One update for the tasks without result and one for the tasks with result.
+        with self.assertNumUpdates(2):
+            buffer.flush()
+        tasks[1].refresh_from_db()
+        self.assertEqual(tasks[1].result, {"args": ["task error"]})
+
+    def test_flush_bulk_update_failure(self):
+        tasks = self._create_tasks(2)
+        buffer = CompletionBuffer(size=10, interval=60)
+        for task in tasks:
+            task.status = FutureTask.FUTURE_TASK_STATUS_DONE
+            buffer.add(task)
+        bulk_update = QuerySet.bulk_update
+        calls = []
+
+        def failing_bulk_update(queryset, *args, **kwargs):
+            calls.append(args)
+            if len(calls) == 1:
+                raise DatabaseError("bulk update failed")
+            return bulk_update(queryset, *args, **kwargs)
+
+        # The tasks are written one by one instead.
+        with mock.patch.object(
+            QuerySet,
+            "bulk_update",
+            failing_bulk_update,
+        ), self.assertLogs("process_future_tasks", "ERROR"):
+            buffer.flush()
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(self._number_of_done_tasks(), 2)
+        self.assertEqual(buffer.pending_pks(), [])
+
+    def test_flush_failure_keeps_tasks(self):
+        tasks = self._create_tasks(2)
+        buffer = CompletionBuffer(size=10, interval=60)
+        for task in tasks:
+            task.status = FutureTask.FUTURE_TASK_STATUS_DONE
+            buffer.add(task)
+        with mock.patch.object(
+            QuerySet,
+            "bulk_update",
+            side_effect=DatabaseError("bulk update failed"),
+        ), self.assertLogs("process_future_tasks", "ERROR"):
+            buffer.flush()
+        self.assertEqual(self._number_of_done_tasks(), 0)
+        self.assertEqual(buffer.pending_pks(), [task.pk for task in tasks])
+        buffer.flush()
+        self.assertEqual(self._number_of_done_tasks(), 2)
+
+    def test_flush_retry_superseded(self):
+        [task] = self._create_tasks(1)
+        FutureTask.objects.filter(pk=task.pk).update(dedup_key="key")
+        FutureTask.objects.create(
+            task_id="newer",
+            eta=timezone.now(),
+            type=settings.FUTURE_TASK_TYPE_ONE,
+            dedup_key="key",
+        )
+        buffer = CompletionBuffer(size=10, interval=60)
+        task.dedup_key = "key"
+        task.status = FutureTask.FUTURE_TASK_STATUS_OPEN
+        buffer.add(task)
+        with self.assertLogs("process_future_tasks", "ERROR"):
+            buffer.flush()
+        task.refresh_from_db()
+        self.assertEqual(task.status, FutureTask.FUTURE_TASK_STATUS_ERROR)
+        self.assertEqual(buffer.pending_pks(), [])
+
+    @time_machine.travel("2024-01-01 00:00 +0000", tick=False)
+    def test_process_future_tasks_onetimerun_flush_size(self):
+        for i in range(3):
+            FutureTask.objects.create(
+                task_id=f"task_{i}",
+                eta=timezone.now(),
+                type=settings.FUTURE_TASK_TYPE_ONE,
+            )
+        call_command("process_future_tasks", onetimerun=True, flush_size=10)
+        self.assertEqual(self._number_of_done_tasks(), 3)
@@ -0,0 +1,97 @@
+from unittest import mock
+
+import time_machine
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.test import TransactionTestCase
+from django.utils import timezone
+
+from django_future_tasks.management.commands.process_future_tasks import (
+    Command as ProcessTasksCommand,
+)
+from django_future_tasks.models import FutureTask
+from tests.core import settings
+
+
+class TestFutureTasksConcurrency(TransactionTestCase):
+    @time_machine.travel("2024-01-01 00:00 +0000", tick=False)
+    def test_process_future_tasks_thread_pool(self):
+        _now = timezone.now()
+        for i in range(4):
+            FutureTask.objects.create(
+                task_id=f"task_{i}",
+                eta=_now,
+                type=settings.FUTURE_TASK_TYPE_ONE,
+            )
+        call_command(
+            "process_future_tasks",
+            onetimerun=True,
+            concurrency=2,
+            batch_size=1,
+        )
+        self.assertFalse(
+            FutureTask.objects.exclude(
+                status=FutureTask.FUTURE_TASK_STATUS_DONE,
+            ).exists(),
+        )
+
+    def test_termination_interrupts_in_flight_tasks(self):
+        command = ProcessTasksCommand()
+        tasks = [
+            FutureTask.objects.create(
+                task_id=f"task_{i}",
+                eta=timezone.now(),
+                type=settings.FUTURE_TASK_TYPE_ONE,
+                status=FutureTask.FUTURE_TASK_STATUS_IN_PROGRESS,
+                locked_by=worker_id,
+            )
+            for i, worker_id in enumerate([command.worker_id] * 2 + ["other:1"])
+        ]
+        command.in_flight_task_pks.update(task.pk for task in tasks)
+        command._handle_termination()
+        # The task taken over by another worker is left alone.
+        self.assertEqual(
+            FutureTask.objects.filter(
+                status=FutureTask.FUTURE_TASK_STATUS_INTERRUPTED,
+            ).count(),
+            2,
+        )
+
+    def test_completion_after_termination(self):
+        FutureTask.objects.create(
+            task_id="task",
+            eta=timezone.now(),
+            type=settings.FUTURE_TASK_TYPE_ONE,
+        )
+        command = ProcessTasksCommand()
+        (task,) = command.claim_tasks()
+        # The termination arrives while the task is running, which finishes nevertheless.
+        with mock.patch(
+            "django_future_tasks.management.commands.process_future_tasks.dispatch",
+            side_effect=lambda task, instrumentation: command._handle_termination(),
+        ), self.assertNoLogs("process_future_tasks", "WARNING"):
+            command.execute_task(task)
+        task.refresh_from_db()
+        self.assertEqual(task.status, FutureTask.FUTURE_TASK_STATUS_DONE)
+
+    def test_failing_failure_handling_leaves_no_in_flight_task(self):
+        task = FutureTask.objects.create(
+            task_id="task",
+            eta=timezone.now(),
+            type=settings.FUTURE_TASK_TYPE_ERROR,
+        )
+        command = ProcessTasksCommand()
+        (task,) = command.claim_tasks()
+        with mock.patch.object(
+            command,
+            "_handle_failure",
+            side_effect=DatabaseError,
+        ), self.assertRaises(DatabaseError), self.assertLogs(
+            "process_future_tasks",
+            "ERROR",
+        ):
+            command.process_tasks([task])
+        # A later termination must not interrupt the task, which might have been taken over by another worker.
+        self.assertEqual(command.in_flight_task_pks, set())
+        # Its lease is not renewed anymore, so it is executed again once it expired.
+        self.assertEqual(command.claimed_task_pks, set())
@@ -0,0 +1,227 @@
+from datetime import timedelta
+from unittest import mock
+
+import time_machine
+from django.db import IntegrityError, transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from django_future_tasks import api, schedule_many
+from django_future_tasks.api import (
+    COALESCE_DEBOUNCE,
+    COALESCE_EARLIEST,
+    COALESCE_LATEST,
+)
+from django_future_tasks.lease import reap_expired_leases
+from django_future_tasks.management.commands.process_future_tasks import (
+    Command as ProcessTasksCommand,
+)
+from django_future_tasks.models import FutureTask
+from tests.core import settings
+
+
+class TestDeduplication(TestCase):
+    def test_open_dedup_key_unique(self):
+        FutureTask.objects.create(
+            task_id="task_1",
+            eta=timezone.now(),
+            type=settings.FUTURE_TASK_TYPE_ONE,
+            dedup_key="key",
+        )
+        # Only open tasks are unique per key.
+        FutureTask.objects.create(
+            task_id="task_2",
+            eta=timezone.now(),
+            type=settings.FUTURE_TASK_TYPE_ONE,
+            dedup_key="key",
+            status=FutureTask.FUTURE_TASK_STATUS_DONE,
+        )
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            FutureTask.objects.create(
+                task_id="task_3",
+                eta=timezone.now(),
+                type=settings.FUTURE_TASK_TYPE_ONE,
+                dedup_key="key",
+            )
+
+    @time_machine.travel("2024-01-01 00:00 +0000", tick=False)
+    def test_schedule_many_coalesce(self):
+        _now = timezone.now()
+        for coalesce, eta, data in (
+            (COALESCE_EARLIEST, _now, {"number": 0}),
+            (COALESCE_LATEST, _now + timedelta(minutes=2), {"number": 0}),
+            (COALESCE_DEBOUNCE, _now + timedelta(minutes=1), {"number": 2}),
+        ):
+            with self.subTest(coalesce=coalesce):
+                FutureTask.objects.all().delete()
+                FutureTask.objects.create(
+                    task_id="task",
+                    eta=_now + timedelta(minutes=2),
+                    type=settings.FUTURE_TASK_TYPE_ONE,
+                    data={"number": 0},
+                    dedup_key="key",
+                )
+                tasks = schedule_many(
+                    [
+                        {
+                            "type": settings.FUTURE_TASK_TYPE_ONE,
+                            "eta": _now,
+                            "data": {"number": 1},
+                            "dedup_key": "key",
+                        },
+                        {
+                            "type": settings.FUTURE_TASK_TYPE_ONE,
+                            "eta": _now + timedelta(minutes=1),
+                            "data": {"number": 2},
+                            "dedup_key": "key",
+                        },
+                        {"type": settings.FUTURE_TASK_TYPE_ONE},
+                    ],
+                    coalesce=coalesce,
+                )
+                self.assertEqual(len(tasks), 2)
+                self.assertEqual(tasks[0].task_id, "task")
+                self.assertEqual(FutureTask.objects.count(), 2)
+                task = FutureTask.objects.get(task_id="task")
+                self.assertEqual(task.eta, eta)
+                self.assertEqual(task.data, data)
+
+    def test_schedule_many_coalesce_concurrent(self):
+        coalesce_with_open_tasks = api._coalesce_with_open_tasks
+
+        def concurrent_coalesce_with_open_tasks(*args):
+            if not FutureTask.objects.exists():
+                # Another call creates a task with the same key after the open tasks have been fetched.
+                FutureTask.objects.create(
+                    task_id="concurrent",
+                    eta=timezone.now(),
+                    type=settings.FUTURE_TASK_TYPE_ONE,
+                    data={"number": 0},
+                    dedup_key="key",
+                )
+                return set()
+            return coalesce_with_open_tasks(*args)
+
+        with mock.patch(
+            "django_future_tasks.api._coalesce_with_open_tasks",
+            concurrent_coalesce_with_open_tasks,
+        ):
+            [task] = schedule_many(
+                [
+                    {
+                        "type": settings.FUTURE_TASK_TYPE_ONE,
+                        "data": {"number": 1},
+                        "dedup_key": "key",
+                    },
+                ],
+                coalesce=COALESCE_DEBOUNCE,
+            )
+        self.assertEqual(task.task_id, "concurrent")
+        self.assertEqual(task.pk, FutureTask.objects.get().pk)
+        self.assertEqual(FutureTask.objects.get().data, {"number": 1})
+
+    def test_schedule_many_coalesce_within_batch(self):
+        tasks = schedule_many(
+            [
+                {"type": settings.FUTURE_TASK_TYPE_ONE, "dedup_key": "key"},
+                {"type": settings.FUTURE_TASK_TYPE_ONE, "dedup_key": "key"},
+            ],
+        )
+        self.assertEqual(len(tasks), 1)
+        self.assertEqual(FutureTask.objects.get().task_id, tasks[0].task_id)
+
+    def test_schedule_many_coalesce_invalid(self):
+        with self.assertRaises(ValueError):
+            schedule_many([], coalesce="unknown")
+
+    def test_reap_expired_leases_superseded(self):
+        expired_lease = timezone.now() - timedelta(seconds=1)
+        tasks = [
+            FutureTask.objects.create(
+                task_id=f"task_{i}",
+                eta=timezone.now(),
+                type=settings.FUTURE_TASK_TYPE_ONE,
+                status=FutureTask.FUTURE_TASK_STATUS_IN_PROGRESS,
+                lease_expires_at=expired_lease,
+                dedup_key=dedup_key,
+            )
+            for i, dedup_key in enumerate(["key_1", "key_1", "key_2"])
+        ]
+        FutureTask.objects.create(
+            task_id="open",
+            eta=timezone.now(),
+            type=settings.FUTURE_TASK_TYPE_ONE,
+            dedup_key="key_2",
+        )
+        self.assertEqual(reap_expired_leases(), 1)
+        for task in tasks:
+            task.refresh_from_db()
+        self.assertEqual(
+            [task.status for task in tasks],
+            [
+                FutureTask.FUTURE_TASK_STATUS_OPEN,
+                FutureTask.FUTURE_TASK_STATUS_INTERRUPTED,
+                FutureTask.FUTURE_TASK_STATUS_INTERRUPTED,
+            ],
+        )
+
+    @override_settings(
+        FUTURE_TASK_RETRY_POLICIES={
+            settings.FUTURE_TASK_TYPE_ERROR: {"max_attempts": 2},
+        },
+    )
+    def test_retry_superseded(self):
+        task = FutureTask.objects.create(
+            task_id="task",
+            eta=timezone.now(),
+            type=settings.FUTURE_TASK_TYPE_ERROR,
+            dedup_key="key",
+        )
+        FutureTask.objects.create(
+            task_id="newer",
+            eta=timezone.now() + timedelta(hours=1),
+            type=settings.FUTURE_TASK_TYPE_ERROR,
+            status=FutureTask.FUTURE_TASK_STATUS_DONE,
+            dedup_key="key",
+        )
+        command = ProcessTasksCommand()
+        [claimed_task] = command.claim_tasks()
+        # A task with the same key is scheduled while the first one is executed.
+        FutureTask.objects.filter(task_id="newer").update(
+            status=FutureTask.FUTURE_TASK_STATUS_OPEN,
+        )
+        command.execute_task(claimed_task)
+        task.refresh_from_db()
+        self.assertEqual(task.status, FutureTask.FUTURE_TASK_STATUS_ERROR)
+        self.assertEqual(task.attempts, 1)
+
+    @override_settings(
+        FUTURE_TASK_RETRY_POLICIES={
+            settings.FUTURE_TASK_TYPE_ERROR: {"max_attempts": 2},
+        },
+    )
+    def test_retry_superseded_before_completion(self):
+        task = FutureTask.objects.create(
+            task_id="task",
+            eta=timezone.now(),
+            type=settings.FUTURE_TASK_TYPE_ERROR,
+            dedup_key="key",
+        )
+        command = ProcessTasksCommand()
+        [claimed_task] = command.claim_tasks()
+        FutureTask.objects.create(
+            task_id="newer",
+            eta=timezone.now() + timedelta(hours=1),
+            type=settings.FUTURE_TASK_TYPE_ERROR,
+            dedup_key="key",
+        )
+        # The task with the same key is scheduled after the retry has been decided.
+        with mock.patch(
+            "django_future_tasks.retry._is_superseded",
+            return_value=False,
+        ), self.assertLogs("process_future_tasks", "ERROR"):
+            command.execute_task(claimed_task)
+        task.refresh_from_db()
+        self.assertEqual(task.status, FutureTask.FUTURE_TASK_STATUS_ERROR)
+        self.assertEqual(task.attempts, 1)
+        self.assertEqual(command.claimed_task_pks, set())
@@ -0,0 +1,178 @@
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.test import TestCase
+from django.utils import timezone
+
+from django_future_tasks import chain, group
+from django_future_tasks.completion import CompletionBuffer, write_completion
+from django_future_tasks.management.commands.process_future_tasks import (
+    Command as ProcessTasksCommand,
+)
+from django_future_tasks.models import FutureTask
+from tests.core import settings
+
+
+class TestDependencies(TestCase):
+    def statuses(self, tasks):
+        return [FutureTask.objects.get(pk=task.pk).status for task in tasks]
+
+    def test_chain(self):
+        tasks = chain(
+            *[
+                {"type": settings.FUTURE_TASK_TYPE_ONE, "data": {"number": i}}
+                for i in range(3)
+            ],
+        )
+        self.assertEqual(
+            self.statuses(tasks),
+            [
+                FutureTask.FUTURE_TASK_STATUS_OPEN,
+                FutureTask.FUTURE_TASK_STATUS_BLOCKED,
+                FutureTask.FUTURE_TASK_STATUS_BLOCKED,
+            ],
+        )
+        # Each task is released by the completion of the previous one.
+        call_command("process_future_tasks", onetimerun=True)
+        self.assertEqual(
+            self.statuses(tasks),
+            [
+                FutureTask.FUTURE_TASK_STATUS_DONE,
+                FutureTask.FUTURE_TASK_STATUS_OPEN,
+                FutureTask.FUTURE_TASK_STATUS_BLOCKED,
+            ],
+        )
+        call_command("process_future_tasks", onetimerun=True)
+        call_command("process_future_tasks", onetimerun=True)
+        self.assertEqual(
+            self.statuses(tasks),
+            [FutureTask.FUTURE_TASK_STATUS_DONE] * 3,
+        )
+
+    def test_group(self):
+        tasks = group(
+            [{"type": settings.FUTURE_TASK_TYPE_ONE} for _ in range(3)],
+            callback={"type": settings.FUTURE_TASK_TYPE_TWO},
+        )
+        self.assertEqual(len(tasks), 4)
+        self.assertEqual(tasks[-1].status, FutureTask.FUTURE_TASK_STATUS_BLOCKED)
+        call_command("process_future_tasks", onetimerun=True)
+        self.assertEqual(
+            self.statuses(tasks),
+            [FutureTask.FUTURE_TASK_STATUS_DONE] * 3
+            + [FutureTask.FUTURE_TASK_STATUS_OPEN],
+        )
+
+    def test_group_failed(self):
+        tasks = group(
+            [
+                {"type": settings.FUTURE_TASK_TYPE_ONE},
+                {"type": settings.FUTURE_TASK_TYPE_ERROR},
+            ],
+            callback={"type": settings.FUTURE_TASK_TYPE_TWO},
+        )
+        call_command("process_future_tasks", onetimerun=True)
+        self.assertEqual(
+            self.statuses(tasks),
+            [
+                FutureTask.FUTURE_TASK_STATUS_DONE,
+                FutureTask.FUTURE_TASK_STATUS_ERROR,
+                FutureTask.FUTURE_TASK_STATUS_BLOCKED,
+            ],
+        )
+
+    def test_depends_on_add(self):
+        dependencies = [
+            FutureTask.objects.create(
+                task_id=f"dependency_{i}",
+                eta=timezone.now(),
+                type=settings.FUTURE_TASK_TYPE_ONE,
+                status=FutureTask.FUTURE_TASK_STATUS_DONE,
+            )
+            for i in range(2)
+        ]
+        task = FutureTask.objects.create(
+            task_id="task",
+            eta=timezone.now(),
+            type=settings.FUTURE_TASK_TYPE_ONE,
+            status=FutureTask.FUTURE_TASK_STATUS_BLOCKED,
+        )
+        # The dependencies are done already, so the task is released right away.
+        task.depends_on.add(*dependencies)
+        task.refresh_from_db()
+        self.assertEqual(task.status, FutureTask.FUTURE_TASK_STATUS_OPEN)
+        self.assertEqual(
+            FutureTask.objects.filter(has_dependents=True).count(),
+            2,
+        )
+
+    def test_depends_on_add_blocks_open_task(self):
+        dependency = FutureTask.objects.create(
+            task_id="dependency",
+            eta=timezone.now(),
+            type=settings.FUTURE_TASK_TYPE_ONE,
+        )
+        task = FutureTask.objects.create(
+            task_id="task",
+            eta=timezone.now(),
+            type=settings.FUTURE_TASK_TYPE_ONE,
+        )
+        task.depends_on.add(dependency)
+        self.assertEqual(task.status, FutureTask.FUTURE_TASK_STATUS_BLOCKED)
+        self.assertEqual(self.statuses([task]), [FutureTask.FUTURE_TASK_STATUS_BLOCKED])
+
+    def test_release_failure_rolls_back_completion(self):
+        dependency, task = chain(
+            {"type": settings.FUTURE_TASK_TYPE_ONE},
+            {"type": settings.FUTURE_TASK_TYPE_ONE},
+        )
+        [claimed_task] = ProcessTasksCommand().claim_tasks()
+        claimed_task.status = FutureTask.FUTURE_TASK_STATUS_DONE
+        with mock.patch(
+            "django_future_tasks.completion.release_dependents",
+            side_effect=DatabaseError("release failed"),
+        ), self.assertRaises(DatabaseError):
+            write_completion([claimed_task])
+        self.assertEqual(
+            self.statuses([dependency, task]),
+            [
+                FutureTask.FUTURE_TASK_STATUS_IN_PROGRESS,
+                FutureTask.FUTURE_TASK_STATUS_BLOCKED,
+            ],
+        )
+
+    def test_discarded_completion_releases_no_dependents(self):
+        dependency, task = chain(
+            {"type": settings.FUTURE_TASK_TYPE_ONE},
+            {"type": settings.FUTURE_TASK_TYPE_ONE},
+        )
+        command = ProcessTasksCommand()
+        [claimed_task] = command.claim_tasks()
+        # The lease expired and another worker took the task over.
+        FutureTask.objects.filter(pk=dependency.pk).update(locked_by="other")
+        claimed_task.status = FutureTask.FUTURE_TASK_STATUS_DONE
+        with mock.patch(
+            "django_future_tasks.completion.release_dependents",
+        ) as release_dependents, self.assertLogs("process_future_tasks", "WARNING"):
+            write_completion([claimed_task], command.worker_id)
+        release_dependents.assert_called_once_with([], "default")
+        self.assertEqual(
+            self.statuses([dependency, task]),
+            [
+                FutureTask.FUTURE_TASK_STATUS_IN_PROGRESS,
+                FutureTask.FUTURE_TASK_STATUS_BLOCKED,
+            ],
+        )
+
+    def test_completion_buffer_releases_dependents(self):
+        dependency, task = chain(
+            {"type": settings.FUTURE_TASK_TYPE_ONE},
+            {"type": settings.FUTURE_TASK_TYPE_ONE},
+        )
+        buffer = CompletionBuffer(size=10, interval=60)
+        dependency.status = FutureTask.FUTURE_TASK_STATUS_DONE
+        buffer.add(dependency)
+        self.assertEqual(self.statuses([task]), [FutureTask.FUTURE_TASK_STATUS_BLOCKED])
+        buffer.flush()
+        self.assertEqual(self.statuses([task]), [FutureTask.FUTURE_TASK_STATUS_OPEN])
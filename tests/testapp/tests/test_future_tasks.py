@@ -6,6 +6,7 @@ from timeit import default_timer
 
 import time_machine
 from django.core.management import call_command
+from django.db import transaction
 from django.test import TestCase, TransactionTestCase
 from django.utils import timezone
 
@@ -75,16 +76,18 @@ class TestProcessFutureTasks(ProcessTasksCommandMixin, TransactionTestCase):
     @time_machine.travel("2024-01-01 00:00 +0000", tick=True)
     def test_process_future_tasks_eta_ordering(self):
         _now = timezone.now()
-        task_late = FutureTask.objects.create(
-            task_id="task_late",
-            eta=_now,
-            type=settings.FUTURE_TASK_TYPE_ETA_ORDERING,
-        )
-        task_early = FutureTask.objects.create(
-            task_id="task_early",
-            eta=_now - timedelta(microseconds=1),
-            type=settings.FUTURE_TASK_TYPE_ETA_ORDERING,
-        )
+        # Create both tasks at once, so the worker cannot pick up the first one before the second one exists.
+        with transaction.atomic():
+            task_late = FutureTask.objects.create(
+                task_id="task_late",
+                eta=_now,
+                type=settings.FUTURE_TASK_TYPE_ETA_ORDERING,
+            )
+            task_early = FutureTask.objects.create(
+                task_id="task_early",
+                eta=_now - timedelta(microseconds=1),
+                type=settings.FUTURE_TASK_TYPE_ETA_ORDERING,
+            )
         self.assertEqual(task_late.status, FutureTask.FUTURE_TASK_STATUS_OPEN)
         self.assertEqual(task_early.status, FutureTask.FUTURE_TASK_STATUS_OPEN)
         _wait_for_task_status(task_late, FutureTask.FUTURE_TASK_STATUS_DONE)
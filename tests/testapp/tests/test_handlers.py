@@ -0,0 +1,113 @@
+from datetime import timedelta
+from sys import intern
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from django_future_tasks.handlers import _live_signal_receivers, future_task_handler
+from django_future_tasks.models import FutureTask
+from django_future_tasks.schedule import EtaSchedule
+from tests.core import settings
+from tests.testapp import handlers
+
+
+class TestFutureTaskHandlers(TestCase):
+    def test_process_future_tasks_handler(self):
+        task = FutureTask.objects.create(
+            task_id="task",
+            eta=timezone.now(),
+            type=settings.FUTURE_TASK_TYPE_REGISTRY,
+            data={"key": "value"},
+        )
+        call_command("process_future_tasks", onetimerun=True)
+        task.refresh_from_db()
+        self.assertEqual(task.status, FutureTask.FUTURE_TASK_STATUS_DONE)
+        self.assertEqual(task.result, {"key": "value"})
+
+    def test_process_future_tasks_unknown_type(self):
+        task = FutureTask.objects.create(
+            task_id="task",
+            eta=timezone.now(),
+            type=settings.FUTURE_TASK_TYPE_UNKNOWN,
+        )
+        call_command("process_future_tasks", onetimerun=True)
+        task.refresh_from_db()
+        self.assertEqual(task.status, FutureTask.FUTURE_TASK_STATUS_ERROR)
+        self.assertEqual(
+            task.result["exception"],
+            "An exception of type UnknownTaskTypeError occurred.",
+        )
+
+    def test_duplicate_handler(self):
+        with self.assertRaises(ImproperlyConfigured):
+            future_task_handler(settings.FUTURE_TASK_TYPE_REGISTRY)(lambda task: None)
+
+    def test_live_signal_receivers(self):
+        # Pins the private API of the signals used by the instrumented dispatch, for each supported Django version.
+        self.assertEqual(
+            _live_signal_receivers(intern(settings.FUTURE_TASK_TYPE_ONE)),
+            [handlers.my_task_function1],
+        )
+        self.assertEqual(
+            _live_signal_receivers(intern(settings.FUTURE_TASK_TYPE_ASYNC)),
+            [handlers.my_task_function_async],
+        )
+        self.assertEqual(
+            _live_signal_receivers(intern(settings.FUTURE_TASK_TYPE_UNKNOWN)),
+            [],
+        )
+
+
+class TestFutureTasksTypes(TestCase):
+    def setUp(self):
+        for task_type in (settings.FUTURE_TASK_TYPE_ONE, settings.FUTURE_TASK_TYPE_TWO):
+            FutureTask.objects.create(
+                task_id=task_type,
+                eta=timezone.now(),
+                type=task_type,
+            )
+
+    def _done_task_ids(self):
+        return set(
+            FutureTask.objects.filter(
+                status=FutureTask.FUTURE_TASK_STATUS_DONE,
+            ).values_list("task_id", flat=True),
+        )
+
+    def test_process_future_tasks_types(self):
+        call_command(
+            "process_future_tasks",
+            onetimerun=True,
+            types=settings.FUTURE_TASK_TYPE_ONE,
+        )
+        self.assertEqual(self._done_task_ids(), {settings.FUTURE_TASK_TYPE_ONE})
+
+    def test_process_future_tasks_exclude_types(self):
+        call_command(
+            "process_future_tasks",
+            onetimerun=True,
+            exclude_types=f"{settings.FUTURE_TASK_TYPE_ONE}, {settings.FUTURE_TASK_TYPE_ERROR}",
+        )
+        self.assertEqual(self._done_task_ids(), {settings.FUTURE_TASK_TYPE_TWO})
+
+    def test_process_future_tasks_unknown_types(self):
+        with self.assertRaisesMessage(CommandError, "Unknown task types: unknown"):
+            call_command("process_future_tasks", onetimerun=True, types="unknown")
+
+    def test_schedule_types(self):
+        FutureTask.objects.create(
+            task_id="task_future",
+            eta=timezone.now() + timedelta(seconds=10),
+            type=settings.FUTURE_TASK_TYPE_ONE,
+        )
+        schedule = EtaSchedule(
+            horizon=60,
+            queryset=FutureTask.objects.filter(type=settings.FUTURE_TASK_TYPE_TWO),
+        )
+        self.assertAlmostEqual(
+            schedule.seconds_until_next(timezone.now()),
+            60,
+            delta=1,
+        )
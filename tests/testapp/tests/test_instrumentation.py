@@ -0,0 +1,149 @@
+import asyncio
+import tracemalloc
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from django_future_tasks.instrumentation import (
+    CompositeInstrumentation,
+    InMemorySpanExporter,
+    Instrumentation,
+    NoopSpanExporter,
+    ProfilingInstrumentation,
+    Span,
+    TracingInstrumentation,
+    get_instrumentation,
+)
+from django_future_tasks.management.commands.process_future_tasks import (
+    Command as ProcessTasksCommand,
+)
+from django_future_tasks.models import FutureTask
+from tests.core import settings
+
+
+class RecordingInstrumentation(Instrumentation):
+    def __init__(self):
+        self.calls = []
+
+    def pre_claim(self, limit):
+        self.calls.append("pre_claim")
+
+    def post_claim(self, tasks, duration):
+        self.calls.append("post_claim")
+
+    def pre_dispatch(self, task):
+        self.calls.append("pre_dispatch")
+
+    def post_receiver(self, task, receiver, duration, exception):
+        self.calls.append(f"post_receiver {receiver.__name__}")
+
+    def post_dispatch(self, task, duration):
+        self.calls.append(f"post_dispatch {task.status}")
+
+    def post_persist(self, tasks, duration):
+        self.calls.append(f"post_persist {len(tasks)}")
+
+
+class TestInstrumentation(TestCase):
+    def _process_tasks(self, instrumentation, task_type, **kwargs):
+        FutureTask.objects.create(
+            task_id="task",
+            eta=timezone.now(),
+            type=task_type,
+            data={"key": "value"},
+        )
+        command = ProcessTasksCommand()
+        command.instrumentation = instrumentation
+        call_command(command, onetimerun=True, **kwargs)
+        return FutureTask.objects.get(task_id="task")
+
+    def test_hooks(self):
+        instrumentation = RecordingInstrumentation()
+        self._process_tasks(instrumentation, settings.FUTURE_TASK_TYPE_ONE)
+        self.assertEqual(
+            instrumentation.calls,
+            [
+                "pre_claim",
+                "post_claim",
+                "pre_dispatch",
+                "post_receiver my_task_function1",
+                "post_dispatch done",
+                "post_persist 1",
+            ],
+        )
+
+    def test_hooks_flush_size(self):
+        instrumentation = RecordingInstrumentation()
+        self._process_tasks(
+            instrumentation,
+            settings.FUTURE_TASK_TYPE_REGISTRY,
+            flush_size=10,
+        )
+        self.assertIn("post_receiver my_task_handler", instrumentation.calls)
+        self.assertEqual(instrumentation.calls[-1], "post_persist 1")
+
+    def test_tracing(self):
+        exporter = InMemorySpanExporter()
+        self._process_tasks(
+            TracingInstrumentation(exporter),
+            settings.FUTURE_TASK_TYPE_ERROR,
+        )
+        claim_span, dispatch_span, receiver_span, persist_span = exporter.spans[:4]
+        self.assertEqual(claim_span.name, "future_task.claim")
+        self.assertEqual(dispatch_span.name, "future_task.dispatch")
+        self.assertEqual(dispatch_span.status, Span.STATUS_ERROR)
+        self.assertEqual(dispatch_span.attributes["future_task.type"], "task_error")
+        self.assertEqual(receiver_span.name, "future_task.receiver")
+        self.assertEqual(receiver_span.parent_id, dispatch_span.span_id)
+        self.assertEqual(receiver_span.trace_id, dispatch_span.trace_id)
+        self.assertEqual(
+            receiver_span.attributes["future_task.receiver"],
+            "tests.testapp.handlers.my_task_function_error",
+        )
+        self.assertEqual(persist_span.name, "future_task.persist")
+        self.assertLessEqual(dispatch_span.start_time, receiver_span.start_time)
+        self.assertLessEqual(receiver_span.end_time, dispatch_span.end_time)
+
+    def test_profiling(self):
+        task = self._process_tasks(
+            ProfilingInstrumentation(threshold=0, memory=True),
+            settings.FUTURE_TASK_TYPE_REGISTRY,
+        )
+        self.assertEqual(task.result["key"], "value")
+        self.assertTrue(task.result["profile"]["functions"])
+        self.assertIn("memory_peak", task.result["profile"])
+        # Memory tracing is stopped as soon as no task is profiled anymore.
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_profiling_async(self):
+        instrumentation = ProfilingInstrumentation(threshold=0)
+        task = FutureTask(pk=1, result={})
+
+        async def dispatch():
+            instrumentation.pre_dispatch(task)
+            instrumentation.post_dispatch(task, 1)
+
+        asyncio.run(dispatch())
+        self.assertNotIn("profile", task.result)
+
+    def test_profiling_threshold(self):
+        task = self._process_tasks(
+            ProfilingInstrumentation(threshold=60),
+            settings.FUTURE_TASK_TYPE_REGISTRY,
+        )
+        self.assertNotIn("profile", task.result)
+
+    @override_settings(
+        FUTURE_TASK_INSTRUMENTATIONS=[
+            "django_future_tasks.instrumentation.TracingInstrumentation",
+            "django_future_tasks.instrumentation.ProfilingInstrumentation",
+        ],
+    )
+    def test_get_instrumentation(self):
+        instrumentation = get_instrumentation()
+        self.assertIsInstance(instrumentation, CompositeInstrumentation)
+        self.assertIsInstance(
+            instrumentation.instrumentations[0].exporter,
+            NoopSpanExporter,
+        )
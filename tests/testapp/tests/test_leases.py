@@ -0,0 +1,158 @@
+from datetime import timedelta
+from unittest import mock
+
+import time_machine
+from django.db import DatabaseError
+from django.test import TestCase
+from django.utils import timezone
+
+from django_future_tasks.completion import CompletionBuffer
+from django_future_tasks.lease import reap_expired_leases
+from django_future_tasks.management.commands.process_future_tasks import (
+    Command as ProcessTasksCommand,
+)
+from django_future_tasks.models import FutureTask
+from tests.core import settings
+
+
+class TestFutureTasksLease(TestCase):
+    @time_machine.travel("2024-01-01 00:00 +0000", tick=False)
+    def test_claim_tasks_lease(self):
+        task = FutureTask.objects.create(
+            task_id="task",
+            eta=timezone.now(),
+            type=settings.FUTURE_TASK_TYPE_ONE,
+        )
+        command = ProcessTasksCommand()
+        command.lease_duration = 60
+        command.claim_tasks()
+        task.refresh_from_db()
+        self.assertEqual(task.locked_by, command.worker_id)
+        self.assertEqual(task.lease_expires_at, timezone.now() + timedelta(seconds=60))
+
+    def test_heartbeat(self):
+        with time_machine.travel("2024-01-01 00:00 +0000", tick=False):
+            tasks = [
+                FutureTask.objects.create(
+                    task_id=f"task_{i}",
+                    eta=timezone.now(),
+                    type=settings.FUTURE_TASK_TYPE_ONE,
+                )
+                for i in range(2)
+            ]
+            command = ProcessTasksCommand()
+            command.lease_duration = 60
+            command.batch_size = 1
+            command.claim_tasks()
+            # The worker of the second task died.
+            dead_command = ProcessTasksCommand()
+            dead_command.worker_id = "dead"
+            dead_command.lease_duration = 60
+            dead_command.claim_tasks()
+
+        with time_machine.travel("2024-01-01 00:00:50 +0000", tick=False):
+            command.heartbeat()
+            for task in tasks:
+                task.refresh_from_db()
+            self.assertEqual(
+                tasks[0].lease_expires_at,
+                timezone.now() + timedelta(seconds=60),
+            )
+            self.assertEqual(tasks[1].status, FutureTask.FUTURE_TASK_STATUS_IN_PROGRESS)
+
+        with time_machine.travel("2024-01-01 00:01:01 +0000", tick=False):
+            command.heartbeat()
+            for task in tasks:
+                task.refresh_from_db()
+            self.assertEqual(tasks[0].status, FutureTask.FUTURE_TASK_STATUS_IN_PROGRESS)
+            self.assertEqual(tasks[1].status, FutureTask.FUTURE_TASK_STATUS_OPEN)
+            self.assertIsNone(tasks[1].locked_by)
+
+    def test_heartbeat_renews_claimed_and_buffered_tasks(self):
+        with time_machine.travel("2024-01-01 00:00 +0000", tick=False):
+            tasks = [
+                FutureTask.objects.create(
+                    task_id=f"task_{i}",
+                    eta=timezone.now(),
+                    type=settings.FUTURE_TASK_TYPE_ONE,
+                )
+                for i in range(2)
+            ]
+            command = ProcessTasksCommand()
+            command.lease_duration = 60
+            command.completion_buffer = CompletionBuffer(
+                size=10,
+                interval=600,
+                worker_id=command.worker_id,
+            )
+            claimed_tasks = command.claim_tasks()
+            # The first task waits in the completion buffer, the second one for its execution.
+            command.execute_task(claimed_tasks[0])
+
+        with time_machine.travel("2024-01-01 00:00:50 +0000", tick=False):
+            command.heartbeat()
+            for task in tasks:
+                task.refresh_from_db()
+                self.assertEqual(
+                    task.lease_expires_at,
+                    timezone.now() + timedelta(seconds=60),
+                )
+
+    def test_complete_task_taken_over(self):
+        task = FutureTask.objects.create(
+            task_id="task",
+            eta=timezone.now(),
+            type=settings.FUTURE_TASK_TYPE_ONE,
+        )
+        command = ProcessTasksCommand()
+        [claimed_task] = command.claim_tasks()
+        # The lease expired and another worker took the task over.
+        FutureTask.objects.filter(pk=task.pk).update(locked_by="other")
+        with self.assertLogs("process_future_tasks", "WARNING"):
+            command.execute_task(claimed_task)
+        task.refresh_from_db()
+        self.assertEqual(task.status, FutureTask.FUTURE_TASK_STATUS_IN_PROGRESS)
+        self.assertEqual(task.locked_by, "other")
+        self.assertEqual(command.claimed_task_pks, set())
+
+    def test_process_tasks_failure_hands_back_tasks(self):
+        for i in range(3):
+            FutureTask.objects.create(
+                task_id=f"task_{i}",
+                eta=timezone.now(),
+                type=settings.FUTURE_TASK_TYPE_ONE,
+            )
+        command = ProcessTasksCommand()
+        task_list = command.claim_tasks()
+        with mock.patch(
+            "django_future_tasks.management.commands.process_future_tasks.write_task_completion",
+            side_effect=DatabaseError("write failed"),
+        ), self.assertRaises(DatabaseError):
+            command.process_tasks(task_list)
+        self.assertEqual(
+            list(
+                FutureTask.objects.order_by("task_id").values_list("status", flat=True)
+            ),
+            [
+                FutureTask.FUTURE_TASK_STATUS_IN_PROGRESS,
+                FutureTask.FUTURE_TASK_STATUS_OPEN,
+                FutureTask.FUTURE_TASK_STATUS_OPEN,
+            ],
+        )
+        # The lease of the failed task is not renewed anymore, so it expires.
+        self.assertEqual(command.claimed_task_pks, set())
+
+    def test_reap_expired_leases_interrupted(self):
+        task = FutureTask.objects.create(
+            task_id="task",
+            eta=timezone.now(),
+            type=settings.FUTURE_TASK_TYPE_ONE,
+            status=FutureTask.FUTURE_TASK_STATUS_IN_PROGRESS,
+            lease_expires_at=timezone.now() - timedelta(seconds=1),
+        )
+        self.assertEqual(
+            reap_expired_leases(FutureTask.FUTURE_TASK_STATUS_INTERRUPTED),
+            1,
+        )
+        task.refresh_from_db()
+        self.assertEqual(task.status, FutureTask.FUTURE_TASK_STATUS_INTERRUPTED)
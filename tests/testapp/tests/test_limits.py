@@ -0,0 +1,74 @@
+from datetime import timedelta
+
+import time_machine
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from django_future_tasks.limits import TaskLimit
+from django_future_tasks.management.commands.process_future_tasks import (
+    Command as ProcessTasksCommand,
+)
+from django_future_tasks.models import FutureTask
+from tests.core import settings
+
+
+class TestFutureTasksLimits(TestCase):
+    def create_tasks(self, number, task_type=settings.FUTURE_TASK_TYPE_ONE, **kwargs):
+        return [
+            FutureTask.objects.create(
+                task_id=f"{task_type}_{FutureTask.objects.count()}",
+                eta=timezone.now(),
+                type=task_type,
+                **kwargs,
+            )
+            for _ in range(number)
+        ]
+
+    @override_settings(
+        FUTURE_TASK_LIMITS={settings.FUTURE_TASK_TYPE_ONE: {"rate": "2/s"}},
+    )
+    def test_rate_limit(self):
+        with time_machine.travel("2024-01-01 00:00 +0000", tick=False):
+            self.create_tasks(5)
+            self.create_tasks(1, settings.FUTURE_TASK_TYPE_TWO)
+            command = ProcessTasksCommand()
+            self.assertEqual(
+                sorted(task.type for task in command.claim_tasks()),
+                [settings.FUTURE_TASK_TYPE_ONE] * 2 + [settings.FUTURE_TASK_TYPE_TWO],
+            )
+            # The rate limited tasks are left open, rather than claimed and delayed.
+            self.assertEqual(command.claim_tasks(), [])
+            self.assertEqual(
+                command.next_token_at,
+                timezone.now() + timedelta(seconds=0.5),
+            )
+
+        with time_machine.travel("2024-01-01 00:00:01 +0000", tick=False):
+            # The limit holds across workers.
+            self.assertEqual(len(ProcessTasksCommand().claim_tasks()), 2)
+            self.assertEqual(
+                FutureTask.objects.filter(
+                    status=FutureTask.FUTURE_TASK_STATUS_OPEN,
+                ).count(),
+                1,
+            )
+
+    @override_settings(
+        FUTURE_TASK_LIMITS={settings.FUTURE_TASK_TYPE_ONE: {"concurrency": 2}},
+    )
+    def test_concurrency_limit(self):
+        self.create_tasks(1, status=FutureTask.FUTURE_TASK_STATUS_IN_PROGRESS)
+        self.create_tasks(3)
+        command = ProcessTasksCommand()
+        self.assertEqual(len(command.claim_tasks()), 1)
+        self.assertEqual(command.claim_tasks(), [])
+        self.assertIsNone(command.next_token_at)
+
+    def test_task_limit(self):
+        task_limit = TaskLimit(rate="100/m", concurrency=4)
+        self.assertAlmostEqual(task_limit.rate, 100 / 60)
+        self.assertEqual(task_limit.burst, 100)
+        self.assertEqual(TaskLimit(rate="100/m", burst=10).burst, 10)
+        with self.assertRaises(ImproperlyConfigured):
+            TaskLimit(rate="100/week")
@@ -0,0 +1,83 @@
+import urllib.error
+import urllib.request
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from django_future_tasks.management.commands.process_future_tasks import (
+    Command as ProcessTasksCommand,
+)
+from django_future_tasks.metrics import PrometheusMetrics, start_metrics_server
+from django_future_tasks.models import FutureTask
+from tests.core import settings
+
+
+class TestMetrics(TestCase):
+    def test_render(self):
+        metrics = PrometheusMetrics(buckets=(1, 10))
+        metrics.increment("tasks_total", labels={"type": 'a"b'})
+        metrics.increment("tasks_total", 2, labels={"type": 'a"b'})
+        metrics.set("tasks_due", 5)
+        metrics.observe("duration_seconds", 0.5)
+        metrics.observe("duration_seconds", 20)
+        self.assertEqual(
+            metrics.render(),
+            "# TYPE duration_seconds histogram\n"
+            'duration_seconds_bucket{le="1"} 1\n'
+            'duration_seconds_bucket{le="10"} 1\n'
+            'duration_seconds_bucket{le="+Inf"} 2\n'
+            "duration_seconds_sum 20.5\n"
+            "duration_seconds_count 2\n"
+            "# TYPE tasks_due gauge\n"
+            "tasks_due 5\n"
+            "# TYPE tasks_total counter\n"
+            'tasks_total{type="a\\"b"} 3.0\n',
+        )
+
+    def test_process_future_tasks_metrics(self):
+        FutureTask.objects.create(
+            task_id="task_one",
+            eta=timezone.now(),
+            type=settings.FUTURE_TASK_TYPE_ONE,
+        )
+        FutureTask.objects.create(
+            task_id="task_error",
+            eta=timezone.now(),
+            type=settings.FUTURE_TASK_TYPE_ERROR,
+        )
+        command = ProcessTasksCommand()
+        command.metrics = metrics = PrometheusMetrics()
+        call_command(command, onetimerun=True)
+        command.heartbeat()
+        output = metrics.render()
+        self.assertIn('future_tasks_claimed_total{type="task_one"} 1.0', output)
+        self.assertIn(
+            'future_tasks_completed_total{status="done",type="task_one"} 1.0',
+            output,
+        )
+        self.assertIn(
+            'future_tasks_completed_total{status="error",type="task_error"} 1.0',
+            output,
+        )
+        self.assertIn('future_task_execution_seconds_count{type="task_one"} 1', output)
+        self.assertIn('future_task_lag_seconds_count{type="task_error"} 1', output)
+        self.assertIn(
+            'future_task_tick_seconds_count{command="process_future_tasks"} 1',
+            output,
+        )
+        self.assertIn("future_tasks_due 0", output)
+
+    def test_metrics_server(self):
+        metrics = PrometheusMetrics()
+        metrics.set("tasks_due", 1)
+        server = start_metrics_server(metrics, 0, "127.0.0.1")
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}"
+            with urllib.request.urlopen(f"{url}/metrics") as response:
+                self.assertEqual(response.read().decode(), metrics.render())
+            with self.assertRaises(urllib.error.HTTPError):
+                urllib.request.urlopen(f"{url}/other")
+        finally:
+            server.shutdown()
+            server.server_close()
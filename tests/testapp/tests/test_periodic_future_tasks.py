@@ -1,10 +1,18 @@
 import time
 from datetime import timedelta
 
+import time_machine
+from croniter import croniter_range
 from django.core.exceptions import ValidationError
-from django.test import TransactionTestCase
+from django.core.management import CommandError
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
 from django.utils import timezone
 
+from django_future_tasks.cron import cron_range, next_execution
+from django_future_tasks.management.commands.populate_periodic_future_tasks import (
+    Command as PopulatePeriodicTasksCommand,
+)
+from django_future_tasks.metrics import PrometheusMetrics
 from django_future_tasks.models import FutureTask, PeriodicFutureTask
 from tests.core import settings
 from tests.testapp.mixins import PopulatePeriodicTaskCommandMixin
@@ -137,3 +145,155 @@ class TestPeriodicFutureTasks(PopulatePeriodicTaskCommandMixin, TransactionTestC
         p_task.max_number_of_executions = 42
         p_task.end_time = timezone.now()
         self.assertRaises(ValidationError, p_task.save)
+
+
+class TestPopulatePeriodicFutureTasksCatchUp(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.command = PopulatePeriodicTasksCommand()
+        self.command._handle_options({"shard": None, "metrics_port": None})
+        self.command.tick = 0
+
+    def _create_periodic_task(self, **kwargs):
+        p_task = PeriodicFutureTask.objects.create(
+            periodic_task_id="periodic task",
+            type=settings.FUTURE_TASK_TYPE_ONE,
+            **{"cron_string": "* * * * * *", **kwargs},
+        )
+        p_task.last_task_creation = timezone.now() - timedelta(hours=1)
+        p_task.save()
+        return p_task
+
+    @time_machine.travel("2024-01-01 00:00 +0000", tick=False)
+    def test_populate_catch_up(self):
+        p_task = self._create_periodic_task()
+        self.command.handle_tick()
+        p_task.refresh_from_db()
+        self.assertEqual(p_task.last_task_creation, timezone.now())
+        self.assertTrue(p_task.is_active)
+        # Both ends of the last hour are included.
+        self.assertEqual(
+            FutureTask.objects.filter(periodic_parent_task=p_task).count(),
+            3601,
+        )
+
+    @time_machine.travel("2024-01-01 00:00 +0000", tick=False)
+    def test_populate_priority(self):
+        p_task = self._create_periodic_task(cron_string="0 * * * *", priority=-1)
+        self.command.handle_tick()
+        self.assertEqual(
+            list(
+                FutureTask.objects.filter(periodic_parent_task=p_task).values_list(
+                    "priority",
+                    flat=True,
+                ),
+            ),
+            [-1, -1],
+        )
+
+    @time_machine.travel("2024-01-01 00:00 +0000", tick=False)
+    def test_populate_metrics(self):
+        self._create_periodic_task(cron_string="0 * * * *")
+        self.command.metrics = metrics = PrometheusMetrics()
+        self.command.handle_tick()
+        output = metrics.render()
+        self.assertIn('future_tasks_created_total{type="task_one"} 2', output)
+        self.assertIn(
+            'future_task_tick_seconds_count{command="populate_periodic_future_tasks"} 1',
+            output,
+        )
+
+    @time_machine.travel("2024-01-01 00:00 +0000", tick=False)
+    def test_populate_skips_periodic_task_not_due(self):
+        self._create_periodic_task(cron_string="42 * * * *")
+        self.command.handle_tick()
+        with self.assertNumQueries(1):
+            # Only fetching the periodic tasks due for processing, which is none of them.
+            self.command.handle_tick()
+
+    @time_machine.travel("2024-01-01 00:00 +0000", tick=False)
+    def test_populate_next_run_at(self):
+        p_task = self._create_periodic_task(cron_string="42 * * * *")
+        self.assertEqual(
+            p_task.next_run_at,
+            timezone.now() - timedelta(minutes=18),
+        )
+        self.command.handle_tick()
+        p_task.refresh_from_db()
+        self.assertEqual(
+            p_task.next_run_at,
+            timezone.now() + timedelta(minutes=42),
+        )
+
+    @time_machine.travel("2024-01-01 00:00 +0000", tick=False)
+    def test_populate_catch_up_max_number_of_executions(self):
+        p_task = self._create_periodic_task(max_number_of_executions=10)
+        with self.assertNumQueries(4):
+            # Fetching the periodic tasks, counting the existing single tasks, inserting the new single tasks and
+            # updating the periodic task.
+            self.command.handle_tick()
+        p_task.refresh_from_db()
+        self.assertFalse(p_task.is_active)
+        self.assertEqual(
+            FutureTask.objects.filter(periodic_parent_task=p_task).count(),
+            10,
+        )
+
+
+class TestPopulatePeriodicFutureTasksSharding(TestCase):
+    def _periodic_tasks_of_shard(self, shard):
+        command = PopulatePeriodicTasksCommand()
+        command._handle_options({"shard": shard, "metrics_port": None})
+        return set(command.active_periodic_tasks())
+
+    def test_shards(self):
+        p_tasks = {
+            PeriodicFutureTask.objects.create(
+                periodic_task_id=f"periodic task {i}",
+                type=settings.FUTURE_TASK_TYPE_ONE,
+                cron_string="42 * * * *",
+            )
+            for i in range(5)
+        }
+        first_shard = self._periodic_tasks_of_shard("0/2")
+        second_shard = self._periodic_tasks_of_shard("1/2")
+        self.assertTrue(first_shard)
+        self.assertTrue(second_shard)
+        self.assertFalse(first_shard & second_shard)
+        self.assertEqual(first_shard | second_shard, p_tasks)
+
+    def test_invalid_shard(self):
+        for shard in ["1", "a/2", "2/2", "-1/2"]:
+            with self.subTest(shard=shard):
+                self.assertRaises(
+                    CommandError,
+                    self._periodic_tasks_of_shard,
+                    shard,
+                )
+
+
+class TestCron(SimpleTestCase):
+    def test_cron_range(self):
+        start_time = timezone.now()
+        stop_time = start_time + timedelta(days=2)
+        for cron_string in ["42 * * * *", "*/5 1-3 * * 1,3 */7", "0 0 1 * *"]:
+            with self.subTest(cron_string=cron_string):
+                self.assertEqual(
+                    list(cron_range(cron_string, start_time, stop_time)),
+                    list(croniter_range(start_time, stop_time, cron_string)),
+                )
+
+    def test_cron_range_inclusive(self):
+        start_time = timezone.now().replace(minute=42, second=0, microsecond=0)
+        stop_time = start_time + timedelta(hours=1)
+        self.assertEqual(
+            list(cron_range("42 * * * *", start_time, stop_time)),
+            [start_time, stop_time],
+        )
+
+    def test_next_execution(self):
+        start_time = timezone.now().replace(minute=42, second=0, microsecond=0)
+        self.assertEqual(
+            next_execution("42 * * * *", start_time),
+            start_time + timedelta(hours=1),
+        )
@@ -0,0 +1,98 @@
+import gzip
+import json
+import os
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+import time_machine
+from django import db
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from django_future_tasks.management.commands.process_future_tasks import (
+    Command as ProcessTasksCommand,
+)
+from django_future_tasks.models import FutureTask, PeriodicFutureTask
+from tests.core import settings
+
+
+class TestPruneFutureTasks(TestCase):
+    def _create_task(self, task_id, status, days_ago, **kwargs):
+        return FutureTask.objects.create(
+            task_id=task_id,
+            eta=timezone.now() - timedelta(days=days_ago),
+            type=settings.FUTURE_TASK_TYPE_ONE,
+            status=status,
+            **kwargs,
+        )
+
+    def _task_ids(self):
+        return set(FutureTask.objects.values_list("task_id", flat=True))
+
+    @time_machine.travel("2024-01-01 00:00 +0000", tick=False)
+    def test_prune_future_tasks(self):
+        for i in range(3):
+            self._create_task(f"done_old_{i}", FutureTask.FUTURE_TASK_STATUS_DONE, 8)
+        self._create_task("done_new", FutureTask.FUTURE_TASK_STATUS_DONE, 6)
+        self._create_task("error_old", FutureTask.FUTURE_TASK_STATUS_ERROR, 31)
+        self._create_task("error_new", FutureTask.FUTURE_TASK_STATUS_ERROR, 8)
+        self._create_task("open_old", FutureTask.FUTURE_TASK_STATUS_OPEN, 31)
+        p_task = PeriodicFutureTask.objects.create(
+            periodic_task_id="periodic task",
+            type=settings.FUTURE_TASK_TYPE_ONE,
+            cron_string="* * * * *",
+            max_number_of_executions=10,
+        )
+        self._create_task(
+            "done_old_periodic",
+            FutureTask.FUTURE_TASK_STATUS_DONE,
+            31,
+            periodic_parent_task=p_task,
+        )
+        call_command("prune_future_tasks", chunk_size=2)
+        self.assertEqual(
+            self._task_ids(),
+            {"done_new", "error_new", "open_old", "done_old_periodic"},
+        )
+
+    @time_machine.travel("2024-01-01 00:00 +0000", tick=False)
+    def test_prune_future_tasks_retention_options(self):
+        self._create_task("done", FutureTask.FUTURE_TASK_STATUS_DONE, 2)
+        self._create_task("error", FutureTask.FUTURE_TASK_STATUS_ERROR, 2)
+        call_command("prune_future_tasks", done_retention=3, error_retention=1)
+        self.assertEqual(self._task_ids(), {"done"})
+
+    @time_machine.travel("2024-01-01 00:00 +0000", tick=False)
+    def test_prune_future_tasks_archive(self):
+        self._create_task(
+            "done",
+            FutureTask.FUTURE_TASK_STATUS_DONE,
+            8,
+            result={"key": "value"},
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "archive.jsonl.gz")
+            call_command("prune_future_tasks", archive=path)
+            with gzip.open(path, "rt") as archive:
+                tasks = [json.loads(line) for line in archive]
+        self.assertEqual(len(tasks), 1)
+        self.assertEqual(tasks[0]["task_id"], "done")
+        self.assertEqual(tasks[0]["result"], {"key": "value"})
+        self.assertFalse(FutureTask.objects.exists())
+
+    @time_machine.travel("2024-01-01 00:00 +0000", tick=False)
+    def test_process_future_tasks_prune(self):
+        self._create_task("done", FutureTask.FUTURE_TASK_STATUS_DONE, 8)
+        ProcessTasksCommand().prune()
+        self.assertFalse(FutureTask.objects.exists())
+
+    def test_process_future_tasks_pruner_waits_one_interval(self):
+        self._create_task("done", FutureTask.FUTURE_TASK_STATUS_DONE, 8)
+        command = ProcessTasksCommand()
+        command.prune_interval = 60
+        command._heartbeat_stop.set()
+        with mock.patch.object(db.connection, "close"):
+            command._run_pruner()
+        self.assertTrue(FutureTask.objects.exists())
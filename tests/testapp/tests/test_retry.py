@@ -0,0 +1,96 @@
+from datetime import timedelta
+from unittest import mock
+
+import time_machine
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from django_future_tasks.models import FutureTask
+from django_future_tasks.retry import RetryPolicy
+from tests.core import settings
+
+
+class TestFutureTasksRetry(TestCase):
+    @override_settings(
+        FUTURE_TASK_RETRY_POLICIES={
+            settings.FUTURE_TASK_TYPE_ERROR: {
+                "max_attempts": 2,
+                "backoff_base": 10,
+                "jitter": False,
+            },
+        },
+    )
+    def test_process_future_tasks_retry(self):
+        with time_machine.travel("2024-01-01 00:00 +0000", tick=False):
+            _now = timezone.now()
+            task = FutureTask.objects.create(
+                task_id="task",
+                eta=_now,
+                type=settings.FUTURE_TASK_TYPE_ERROR,
+            )
+            call_command("process_future_tasks", onetimerun=True)
+            task.refresh_from_db()
+            self.assertEqual(task.status, FutureTask.FUTURE_TASK_STATUS_OPEN)
+            self.assertEqual(task.attempts, 1)
+            self.assertEqual(task.eta, _now + timedelta(seconds=10))
+            self.assertEqual(task.result["args"], ["task error"])
+
+        with time_machine.travel("2024-01-01 00:00:10 +0000", tick=False):
+            call_command("process_future_tasks", onetimerun=True)
+            task.refresh_from_db()
+            self.assertEqual(task.status, FutureTask.FUTURE_TASK_STATUS_ERROR)
+            self.assertEqual(task.attempts, 2)
+
+    @override_settings(
+        FUTURE_TASK_RETRY_POLICIES={
+            settings.FUTURE_TASK_TYPE_ERROR: {"backoff_base": 10, "jitter": False},
+        },
+    )
+    def test_process_future_tasks_retry_success(self):
+        with time_machine.travel("2024-01-01 00:00 +0000", tick=False):
+            task = FutureTask.objects.create(
+                task_id="task",
+                eta=timezone.now(),
+                type=settings.FUTURE_TASK_TYPE_ERROR,
+            )
+            call_command("process_future_tasks", onetimerun=True)
+            task.refresh_from_db()
+            self.assertEqual(task.status, FutureTask.FUTURE_TASK_STATUS_OPEN)
+            self.assertEqual(task.result["args"], ["task error"])
+
+        with time_machine.travel(
+            "2024-01-01 00:00:10 +0000",
+            tick=False,
+        ), mock.patch(
+            "django_future_tasks.management.commands.process_future_tasks.dispatch",
+        ):
+            call_command("process_future_tasks", onetimerun=True)
+            task.refresh_from_db()
+            self.assertEqual(task.status, FutureTask.FUTURE_TASK_STATUS_DONE)
+            self.assertEqual(task.attempts, 1)
+            # The error of the failed attempt is not kept.
+            self.assertIsNone(task.result)
+
+    def test_process_future_tasks_no_retry_policy(self):
+        task = FutureTask.objects.create(
+            task_id="task",
+            eta=timezone.now(),
+            type=settings.FUTURE_TASK_TYPE_ERROR,
+        )
+        call_command("process_future_tasks", onetimerun=True)
+        task.refresh_from_db()
+        self.assertEqual(task.status, FutureTask.FUTURE_TASK_STATUS_ERROR)
+        self.assertEqual(task.attempts, 1)
+
+    def test_retry_policy_delay(self):
+        policy = RetryPolicy(backoff_base=2, backoff_cap=60, jitter=False)
+        self.assertEqual(
+            [policy.delay(attempts) for attempts in range(1, 7)],
+            [2, 4, 8, 16, 32, 60],
+        )
+
+    def test_retry_policy_delay_jitter(self):
+        policy = RetryPolicy(backoff_base=2, backoff_cap=60)
+        for _ in range(100):
+            self.assertTrue(8 <= policy.delay(4) <= 16)
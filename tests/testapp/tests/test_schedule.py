@@ -0,0 +1,46 @@
+from datetime import timedelta
+
+import time_machine
+from django.test import TestCase
+from django.utils import timezone
+
+from django_future_tasks.models import FutureTask
+from django_future_tasks.schedule import EtaSchedule
+from tests.core import settings
+
+
+class TestEtaSchedule(TestCase):
+    @time_machine.travel("2024-01-01 00:00 +0000", tick=False)
+    def test_seconds_until_next(self):
+        _now = timezone.now()
+        schedule = EtaSchedule(horizon=60)
+        self.assertEqual(schedule.seconds_until_next(_now), 60)
+
+        FutureTask.objects.create(
+            task_id="task",
+            eta=_now + timedelta(seconds=10),
+            type=settings.FUTURE_TASK_TYPE_ONE,
+        )
+        # The schedule does not know about the new task until it gets refreshed.
+        self.assertEqual(schedule.seconds_until_next(_now), 60)
+        schedule.invalidate()
+        self.assertEqual(schedule.seconds_until_next(_now), 10)
+        self.assertEqual(
+            schedule.seconds_until_next(_now + timedelta(seconds=10)),
+            50,
+        )
+
+    @time_machine.travel("2024-01-01 00:00 +0000", tick=False)
+    def test_seconds_until_next_size(self):
+        _now = timezone.now()
+        for i in range(1, 4):
+            FutureTask.objects.create(
+                task_id=f"task_{i}",
+                eta=_now + timedelta(seconds=i),
+                type=settings.FUTURE_TASK_TYPE_ONE,
+            )
+        schedule = EtaSchedule(horizon=60, size=2)
+        self.assertEqual(schedule.seconds_until_next(_now), 1)
+        self.assertEqual(schedule.seconds_until_next(_now + timedelta(seconds=1)), 1)
+        # The schedule gets refreshed as soon as the last loaded task is due.
+        self.assertEqual(schedule.seconds_until_next(_now + timedelta(seconds=2)), 1)
@@ -1,7 +1,21 @@
+from io import StringIO
+
 from django.conf import settings
-from django.test import SimpleTestCase
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
 
 
 class TestSetup(SimpleTestCase):
     def test_installed_apps(self):
         self.assertIn("django_future_tasks", settings.INSTALLED_APPS)
+
+
+class TestMigrations(TestCase):
+    def test_no_missing_migrations(self):
+        call_command(
+            "makemigrations",
+            "django_future_tasks",
+            check=True,
+            dry_run=True,
+            stdout=StringIO(),
+        )
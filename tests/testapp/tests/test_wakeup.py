@@ -0,0 +1,104 @@
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from django_future_tasks.models import FutureTask
+from django_future_tasks.wakeup import (
+    NOTIFY_CHANNEL,
+    PollingWakeup,
+    PostgresWakeup,
+    get_wakeup_backend,
+)
+from tests.core import settings
+
+
+class TestWakeup(TestCase):
+    def test_polling_wakeup_timeout(self):
+        wakeup = PollingWakeup()
+        self.assertFalse(wakeup.wait(0.01, wakeup.generation))
+
+    def test_polling_wakeup_wake_up(self):
+        wakeup = PollingWakeup()
+        generation = wakeup.generation
+        wakeup.wake_up()
+        self.assertTrue(wakeup.wait(1, generation))
+
+    def test_notify_workers_on_open_task(self):
+        wakeup = get_wakeup_backend()
+        generation = wakeup.generation
+        with self.captureOnCommitCallbacks(execute=True):
+            task = FutureTask.objects.create(
+                task_id="task",
+                eta=timezone.now(),
+                type=settings.FUTURE_TASK_TYPE_ONE,
+            )
+        self.assertNotEqual(wakeup.generation, generation)
+
+        generation = wakeup.generation
+        with self.captureOnCommitCallbacks(execute=True):
+            task.status = FutureTask.FUTURE_TASK_STATUS_DONE
+            task.save()
+        self.assertEqual(wakeup.generation, generation)
+
+
+class TestPostgresWakeup(TestCase):
+    def setUp(self):
+        super().setUp()
+        # The connection is mocked, as the tests do not run on PostgreSQL.
+        self.raw_connection = mock.Mock(notifies=[])
+        self.connection = mock.MagicMock(connection=self.raw_connection)
+        self.wakeup = PostgresWakeup()
+        for patcher in (
+            mock.patch(
+                "django_future_tasks.wakeup.connections",
+                {"default": self.connection},
+            ),
+            mock.patch("django_future_tasks.wakeup._is_psycopg3", return_value=False),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_listen(self):
+        with mock.patch.object(PostgresWakeup, "_readable", return_value=False):
+            self.assertFalse(self.wakeup.wait(0.01, self.wakeup.generation))
+            self.assertFalse(self.wakeup.wait(0.01, self.wakeup.generation))
+        # The connection listens once only.
+        self.connection.cursor().__enter__().execute.assert_called_once_with(
+            f"LISTEN {NOTIFY_CHANNEL}",
+        )
+
+    def test_receive_psycopg2(self):
+        self.raw_connection.poll.side_effect = (
+            lambda: self.raw_connection.notifies.append(
+                "notify",
+            )
+        )
+        with mock.patch.object(PostgresWakeup, "_readable", return_value=True):
+            self.assertTrue(self.wakeup.wait(1, self.wakeup.generation))
+        self.assertEqual(self.raw_connection.notifies, [])
+
+    def test_receive_psycopg2_during_query(self):
+        # psycopg2 collected the notification while running another query, so the socket is not readable anymore.
+        self.raw_connection.notifies.append("notify")
+        with mock.patch.object(
+            PostgresWakeup,
+            "_readable",
+            return_value=False,
+        ) as readable:
+            self.assertTrue(self.wakeup.wait(1, self.wakeup.generation))
+        readable.assert_not_called()
+        self.assertEqual(self.raw_connection.notifies, [])
+
+    def test_receive_psycopg3_during_query(self):
+        self.raw_connection.notifies = mock.Mock(return_value=[])
+        with mock.patch(
+            "django_future_tasks.wakeup._is_psycopg3",
+            return_value=True,
+        ), mock.patch.object(PostgresWakeup, "_readable", return_value=False):
+            self.assertFalse(self.wakeup.wait(0.01, self.wakeup.generation))
+            # psycopg drops notifications received while running other queries, unless a handler is registered.
+            (handler,) = self.raw_connection.add_notify_handler.call_args.args
+            handler("notify")
+            self.assertTrue(self.wakeup.wait(1, self.wakeup.generation))
+            self.assertFalse(self.wakeup.wait(0.01, self.wakeup.generation))